@@ -1,6 +1,81 @@
+import time
+
+import CardLoyaltyBatch
+import CardLoyaltyClient
 import CardLoyaltyRequest
 
 
 class Basic (CardLoyaltyRequest.Request):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client: CardLoyaltyClient.LoyaltyClient = None):
+        super().__init__(client)
+
+    def batch(self) -> CardLoyaltyBatch.Batch:
+        """
+        Выполнить несколько независимых запросов одновременно (в пуле потоков клиента)
+
+        Пример:
+        with organization.batch() as batch:
+            client = batch.submit(organization.get_client_by_barcode, "dld123s")
+            tags = batch.submit(service.get_all_tags)
+            templates = batch.submit(service.get_all_templates)
+        client.result(), tags.result(), templates.result()
+
+        :return: объект класса CardLoyaltyBatch.Batch
+        """
+        return CardLoyaltyBatch.Batch(self.client.executor)
+
+    def gather(self, *calls) -> list:
+        """
+        Запустить функции без аргументов одновременно
+
+        :param calls: функции (например, lambda: organization.get_client_by_phone("79161234567"))
+
+        :return: список Future в порядке calls (выполнение не ожидается)
+        """
+        batch = self.batch()
+        return [batch.submit(call) for call in calls]
+
+    def _stale_read(self, endpoint: str, key, fetch):
+        """
+        Прочитать данные с учетом client.stale_policy (stale-while-revalidate)
+
+        Свежая запись возвращается из кэша, устаревшая (не старше max_stale) – тоже из кэша,
+        но обновляется в фоне; если записи нет – запрос к API.
+
+        :param endpoint: метод API (например, "getTags")
+        :param key: ключ запроса (параметры, hashable)
+        :param fetch: функция без аргументов, выполняющая запрос к API
+
+        :return: результат fetch()
+        """
+        policy = self.client.stale_policy.get(endpoint)
+        if policy is None:
+            return fetch()
+
+        key = (endpoint, key)
+        entry = self.client.stale_cache.get(key)
+        if entry is not None:
+            value, stored = entry
+            if time.time() - stored < policy.get("fresh", 0):
+                self.metrics.incr("cache_fresh_hits")
+            else:
+                self.metrics.incr("cache_stale_hits")
+                self.client.background(key, lambda: self.__refresh(key, fetch, policy))
+            return value
+
+        self.metrics.incr("cache_misses")
+        value = fetch()
+        self.__store(key, value, policy)
+        return value
+
+    def __refresh(self, key, fetch, policy: dict):
+        # Ошибка фонового обновления не удаляет запись: она отдается до истечения max_stale
+        try:
+            self.__store(key, fetch(), policy)
+        except Exception as error:
+            self.metrics.incr("cache_refresh_errors")
+            print("refresh", key, error)
+
+    def __store(self, key, value, policy: dict):
+        if value:
+            self.client.stale_cache.set(key, (value, time.time()), ttl=policy.get("max_stale", 0))
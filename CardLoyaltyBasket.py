@@ -1,10 +1,14 @@
-import CardLoyaltyBasic
+class Basket:
+    __slots__ = ("_basket", "_version")
 
-
-class Basket(CardLoyaltyBasic.Basic):
     def __init__(self):
-        super().__init__()
+        """
+        Инициализация объекта класса Basket
+
+        Корзина – только данные, без состояния для запросов к API.
+        """
         self._basket = {}
+        self._version = 0
 
     def add_item(self,
                  product_id: str,
@@ -40,6 +44,7 @@ class Basket(CardLoyaltyBasic.Basic):
         if not self.is_item_in_basket(product_id) and amount > 0 \
                 and price >= 0 and discount_price >= 0:
             self._basket.update({product_id: new_item})
+            self._version += 1
             return True
         else:
             return False
@@ -54,10 +59,21 @@ class Basket(CardLoyaltyBasic.Basic):
         """
         if self.is_item_in_basket(product_id):
             self._basket.pop(product_id)
+            self._version += 1
             return True
         else:
             return False
 
+    def get_version(self) -> int:
+        """
+        Получить версию корзины
+
+        Версия увеличивается при каждом изменении корзины через методы класса.
+
+        :return: int
+        """
+        return self._version
+
     def is_item_in_basket(self, product_id: str) -> bool:
         """
         Проверяет есть ли в корзине товар
@@ -183,6 +199,7 @@ class Basket(CardLoyaltyBasic.Basic):
         """
         if self.is_item_in_basket(product_id) and new_amount > 0:
             self._basket[product_id]["amount"] = new_amount
+            self._version += 1
             return True
         else:
             return False
@@ -198,6 +215,7 @@ class Basket(CardLoyaltyBasic.Basic):
         """
         if self.is_item_in_basket(product_id) and new_price > 0:
             self._basket[product_id]["price"] = new_price
+            self._version += 1
             return True
         else:
             return False
@@ -213,6 +231,21 @@ class Basket(CardLoyaltyBasic.Basic):
         """
         if self.is_item_in_basket(product_id) and new_price_with_discount > 0:
             self._basket[product_id]["priceWithDiscount"] = new_price_with_discount
+            self._version += 1
             return True
         else:
             return False
+
+    def apply_pricing(self, pricing) -> float:
+        """
+        Пересчитать цены со скидкой всех позиций корзины по правилам
+
+        :param pricing: объект класса CardLoyaltyPricing.Pricing
+
+        :return: стоимость корзины с учетом скидок
+        """
+        lines = self.get_basket_for_order()
+        for line, price_with_discount in zip(lines, pricing.get_prices_with_discount(lines)):
+            line["priceWithDiscount"] = price_with_discount
+        self._version += 1
+        return self.get_basket_price_with_discount()
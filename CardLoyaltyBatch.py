@@ -0,0 +1,69 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class Batch:
+    def __init__(self, executor: "ThreadPoolExecutor"):
+        """
+        Инициализация объекта класса Batch
+
+        Независимые запросы к API, которые выполняются одновременно в пуле потоков клиента.
+        При выходе из блока with все запросы завершены; результаты – в Future.
+
+        Пример:
+        with organization.batch() as batch:
+            client = batch.submit(organization.get_client_by_barcode, "dld123s")
+            tags = batch.submit(service.get_all_tags)
+        client.result(), tags.result()
+
+        Нельзя вызывать из задач того же пула (поток будет ждать сам себя).
+
+        :param executor: пул потоков (client.executor)
+        """
+        self._executor = executor
+        self._futures = []
+
+    def submit(self, function, *args, **kwargs) -> "Future":
+        """
+        Добавить запрос
+
+        :param function: функция (например, organization.get_client_by_barcode)
+        :param args: аргументы функции
+        :param kwargs: именованные аргументы функции
+
+        :return: Future с результатом функции
+        """
+        future = self._executor.submit(function, *args, **kwargs)
+        self._futures.append(future)
+        return future
+
+    def wait(self, timeout: float = None) -> list:
+        """
+        Дождаться всех запросов
+
+        :param timeout: максимальное время ожидания в секундах (None – без ограничения)
+
+        :return: список Future в порядке добавления
+        """
+        from concurrent.futures import wait
+
+        wait(self._futures, timeout=timeout)
+        return list(self._futures)
+
+    def cancel(self):
+        """
+        Отменить запросы, которые еще не начали выполняться
+        """
+        for future in self._futures:
+            future.cancel()
+
+    def __enter__(self) -> "Batch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.cancel()
+        self.wait()
+        return False
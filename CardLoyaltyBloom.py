@@ -0,0 +1,47 @@
+import math
+import threading
+
+
+class BloomFilter:
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.01):
+        """
+        Инициализация объекта класса BloomFilter
+
+        Множество строк с ложноположительными ответами: "нет" – значения точно нет,
+        "есть" – значение есть с вероятностью 1 - error_rate.
+
+        :param capacity: ожидаемое количество значений
+        :param error_rate: допустимая доля ложноположительных ответов при capacity значений
+        """
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        # hashlib загружается при создании фильтра, а не при импорте модуля
+        from hashlib import blake2b
+
+        self._blake2b = blake2b
+
+    def add(self, value: str):
+        """
+        Добавить значение
+
+        :param value: значение
+        """
+        positions = self.__positions(value)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self.__positions(value))
+
+    def __positions(self, value: str) -> list:
+        # Двойное хеширование: позиции h1 + i * h2 из одного дайджеста blake2b
+        digest = self._blake2b(value.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
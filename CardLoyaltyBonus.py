@@ -0,0 +1,87 @@
+import math
+
+
+class Bonus:
+    def __init__(self, client: dict):
+        """
+        Инициализация объекта класса Bonus
+
+        :param client: информация по клиенту (результат clientInfo)
+        """
+        self._bonus_balance = self._to_float(client.get("bonusBalance"))
+        self._deposit_balance = self._to_float(client.get("depositBalance"))
+        self._max_percent = self._to_float(client.get("maxPercentBonusWriteOff"))
+
+    def get_max_bonus_write_off(self, basket) -> float:
+        """
+        Получить максимально допустимое списание бонусов
+
+        Ограничено бонусным балансом клиента и maxPercentBonusWriteOff
+        от стоимости корзины со скидкой.
+
+        :param basket: объект класса CardLoyaltyBasket.Basket
+
+        :return: float
+        """
+        limit = basket.get_basket_price_with_discount() * self._max_percent / 100
+        return self._floor(min(self._bonus_balance, limit))
+
+    def get_max_deposit_write_off(self, basket, bonus_write_off: float = 0.00) -> float:
+        """
+        Получить максимально допустимое списание с депозита
+
+        Ограничено депозитным балансом клиента и остатком к оплате после
+        списания бонусов.
+
+        :param basket: объект класса CardLoyaltyBasket.Basket
+        :param bonus_write_off: списано бонусов
+
+        :return: float
+        """
+        rest = basket.get_basket_price_with_discount() - bonus_write_off
+        return self._floor(min(self._deposit_balance, rest))
+
+    @staticmethod
+    def distribute(basket, amount: float) -> dict:
+        """
+        Распределить сумму списания по позициям корзины
+
+        Сумма делится пропорционально стоимости позиций со скидкой с точностью
+        до копейки, остаток копеек отдается позициям с наибольшей дробной частью.
+
+        :param basket: объект класса CardLoyaltyBasket.Basket
+        :param amount: сумма списания
+
+        :return:
+        Пример return:
+        {
+            "84": 12.35,    # ID товара: списано на позицию
+            "97": 7.65
+        }
+        """
+        lines = basket.get_basket_for_order()
+        totals = [line["amount"] * line["priceWithDiscount"] for line in lines]
+        basket_total = sum(totals)
+        kopecks = int(round(amount * 100))
+        if not lines or basket_total <= 0 or kopecks <= 0:
+            return {line["nid"]: 0.00 for line in lines}
+
+        shares = [kopecks * total / basket_total for total in totals]
+        parts = [int(share) for share in shares]
+        rest = kopecks - sum(parts)
+        order = sorted(range(len(lines)), key=lambda i: shares[i] - parts[i], reverse=True)
+        for i in order[:rest]:
+            parts[i] += 1
+
+        return {line["nid"]: part / 100 for line, part in zip(lines, parts)}
+
+    @staticmethod
+    def _to_float(value) -> float:
+        try:
+            return max(float(value), 0.00)
+        except (TypeError, ValueError):
+            return 0.00
+
+    @staticmethod
+    def _floor(value: float) -> float:
+        return max(math.floor(round(value * 100, 6)) / 100, 0.00)
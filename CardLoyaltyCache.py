@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class Cache:
+    def __init__(self, ttl: float = 60.00, max_size: int = 10000):
+        """
+        Инициализация объекта класса Cache
+
+        :param ttl: время жизни записи в секундах
+        :param max_size: максимальное количество записей (при превышении
+                         удаляются самые старые записи)
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Получить значение из кэша
+
+        :param key: ключ
+        :param default: значение, если записи нет или она устарела
+
+        :return: значение
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                self._data.pop(key, None)
+                return default
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        """
+        Записать значение в кэш
+
+        :param key: ключ
+        :param value: значение
+        :param ttl: время жизни записи в секундах (по умолчанию self.ttl)
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            while len(self._data) > self.max_size:
+                self._data.pop(next(iter(self._data)))
+
+    def delete(self, key) -> bool:
+        """
+        Удалить значение из кэша
+
+        :param key: ключ
+
+        :return: True / False
+        """
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        """
+        Очистить кэш
+        """
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,253 @@
+import contextlib
+import importlib.util
+import threading
+from typing import TYPE_CHECKING
+
+import CardLoyaltyCache
+import CardLoyaltyMetrics
+import CardLoyaltySerializer
+import CardLoyaltySingleFlight
+import settings
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+class LoyaltyClient:
+    def __init__(self,
+                 token: str = None,
+                 api: str = None,
+                 pool_size: int = 10,
+                 timeout: float = 30.00,
+                 max_retries: int = 0,
+                 session=None,
+                 workers: int = 4,
+                 ):
+        """
+        Инициализация объекта класса LoyaltyClient
+
+        Настройки подключения к API одной организации (токен, адрес API, пул соединений,
+        ограничения). Передается в Organization / Service; несколько клиентов с разными
+        токенами могут использовать один пул соединений (см. with_token).
+
+        Клиент потокобезопасен: один объект (и созданные с ним Organization / Service)
+        можно использовать из пула потоков. Настройки (headers, compress_thresholds,
+        serializer) только читаются при запросах – меняйте их до начала работы потоков.
+
+        :param token: токен организации (None – settings.TOKEN)
+        :param api: адрес API (None – settings.API)
+        :param pool_size: максимальное количество соединений с API
+        :param timeout: время ожидания ответа в секундах
+        :param max_retries: количество повторов при ошибке соединения
+        :param session: общий requests.Session (None – создать свой при первом запросе)
+        :param workers: количество потоков для фоновых запросов (обновление кэша и т.п.)
+        """
+        self._token = token
+        self._api = api
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.workers = workers
+        self.headers = {
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate, br" if importlib.util.find_spec("brotli") else "gzip, deflate",
+            "Content-Type": "application/json",
+        }
+        self.metrics = CardLoyaltyMetrics.Metrics()
+        # Минимальный размер тела запроса в байтах для сжатия gzip по методам API
+        # (например, {"createClients": 64 * 1024}). Пустой словарь – не сжимать.
+        self.compress_thresholds = {}
+        # Запись запросов (объект класса CardLoyaltyRecorder.Recorder), None – не записывать
+        self.recorder = None
+        # Объединение одинаковых одновременных GET запросов, None – не объединять
+        self.single_flight = CardLoyaltySingleFlight.SingleFlight()
+        # Дублирование медленных запросов (объект класса CardLoyaltyHedger.Hedger), None – не дублировать
+        self.hedger = None
+        # Приоритеты запросов (объект класса CardLoyaltyScheduler.Scheduler), None – без очереди
+        self.scheduler = None
+        # Окна кэша stale-while-revalidate по методам API (clientInfo, getTags, getTemplates, getTag):
+        # {"getTags": {"fresh": 60, "max_stale": 3600}} – до fresh секунд ответ из кэша, до
+        # max_stale – ответ из кэша и обновление в фоне, дальше – запрос к API.
+        # Пустой словарь – без кэша.
+        self.stale_policy = {}
+        self.stale_cache = CardLoyaltyCache.Cache(max_size=10000)
+        self._executor = None
+        self._background = set()
+        self._serializer = None
+        self._session = session
+        self._lock = threading.Lock()
+
+    @property
+    def token(self) -> str:
+        return self._token if self._token is not None else settings.TOKEN
+
+    @token.setter
+    def token(self, value: str):
+        self._token = value
+
+    @property
+    def api(self) -> str:
+        return self._api if self._api is not None else settings.API
+
+    @api.setter
+    def api(self, value: str):
+        self._api = value
+
+    @property
+    def serializer(self) -> CardLoyaltySerializer.Serializer:
+        if self._serializer is None:
+            self._serializer = CardLoyaltySerializer.get_serializer()
+        return self._serializer
+
+    @serializer.setter
+    def serializer(self, value: CardLoyaltySerializer.Serializer):
+        self._serializer = value
+
+    @property
+    def session(self):
+        """
+        Пул соединений с API (requests.Session), создается при первом запросе
+
+        :return: requests.Session
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_size,
+                        pool_maxsize=self.pool_size,
+                        max_retries=self.max_retries
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    @property
+    def executor(self) -> "ThreadPoolExecutor":
+        """
+        Пул потоков для фоновых запросов, создается при первом использовании
+
+        :return: ThreadPoolExecutor
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="cardloyalty"
+                    )
+        return self._executor
+
+    def background(self, key, function):
+        """
+        Выполнить функцию в фоне, если задача с тем же ключом еще не выполняется
+
+        :param key: ключ задачи (hashable)
+        :param function: функция без аргументов
+
+        :return: Future или None, если задача с этим ключом уже выполняется
+        """
+        with self._lock:
+            if key in self._background:
+                return None
+            self._background.add(key)
+
+        def run():
+            try:
+                return function()
+            finally:
+                with self._lock:
+                    self._background.discard(key)
+
+        try:
+            return self.executor.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self._background.discard(key)
+            raise
+
+    def with_token(self, token: str, api: str = None) -> "LoyaltyClient":
+        """
+        Создать клиента другой организации с общим пулом соединений
+
+        :param token: токен организации
+        :param api: адрес API (None – как у текущего клиента)
+
+        :return: объект класса LoyaltyClient
+        """
+        client = LoyaltyClient(
+            token=token,
+            api=api if api is not None else self._api,
+            pool_size=self.pool_size,
+            timeout=self.timeout,
+            max_retries=self.max_retries,
+            session=self.session,
+            workers=self.workers
+        )
+        client.headers = dict(self.headers)
+        client.compress_thresholds = dict(self.compress_thresholds)
+        client.stale_policy = dict(self.stale_policy)
+        # Очередь приоритетов общая: клиенты используют одни соединения
+        client.scheduler = self.scheduler
+        client.serializer = self._serializer
+        return client
+
+    def slot(self, endpoint: str):
+        """
+        Место в очереди запросов client.scheduler (для блока with)
+
+        :param endpoint: метод API
+
+        :return: контекстный менеджер
+        """
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.slot(endpoint)
+
+    def request(self, method: str, url: str, **kwargs):
+        """
+        Отправить HTTP запрос через пул соединений
+
+        :param method: HTTP метод
+        :param url: адрес
+        :param kwargs: параметры requests.Session.request
+
+        :return: requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method=method, url=url, **kwargs)
+
+    def close(self):
+        """
+        Закрыть пул соединений и пул фоновых потоков
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self.hedger is not None:
+            self.hedger.close()
+        if self._session is not None:
+            self._session.close()
+
+
+def get_default_client() -> LoyaltyClient:
+    """
+    Получить клиента по умолчанию (токен и адрес API из settings)
+
+    :return: объект класса LoyaltyClient
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = LoyaltyClient()
+    return _default_client
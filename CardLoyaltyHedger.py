@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import CardLoyaltyMetrics
+
+
+class Hedger:
+    def __init__(self,
+                 percentile: float = 95.00,
+                 budget: float = 0.05,
+                 initial_delay: float = 0.20,
+                 min_delay: float = 0.01,
+                 window: int = 1000,
+                 threads: int = 32,
+                 ):
+        """
+        Инициализация объекта класса Hedger
+
+        Дублирование медленных запросов: если ответа нет дольше percentile-го перцентиля
+        времени ответа метода API, отправляется второй такой же запрос, используется
+        первый полученный ответ. Только для запросов без побочных эффектов.
+        Подключение: client.hedger = Hedger(), где client – CardLoyaltyClient.LoyaltyClient
+
+        :param percentile: перцентиль времени ответа, после которого отправляется дубль
+        :param budget: максимальная доля дублей от всех запросов (0.05 – не больше 5%)
+        :param initial_delay: задержка дубля в секундах, пока замеров меньше 20
+        :param min_delay: минимальная задержка дубля в секундах
+        :param window: количество последних замеров времени ответа по методу API
+        :param threads: количество потоков для запросов
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.window = window
+        self.metrics = CardLoyaltyMetrics.Metrics()
+        self._latencies = {}
+        self._counts = {}
+        self._delays = {}
+        self._requests = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="cardloyalty-hedge")
+
+    def delay(self, endpoint: str) -> float:
+        """
+        Задержка перед отправкой дубля
+
+        :param endpoint: метод API (например, "clientInfo")
+
+        :return: задержка в секундах
+        """
+        return self._delays.get(endpoint, self.initial_delay)
+
+    def run(self, endpoint: str, function):
+        """
+        Выполнить запрос с дублированием
+
+        :param endpoint: метод API (например, "clientInfo")
+        :param function: функция без аргументов, выполняющая запрос
+
+        :return: результат первого успешного запроса
+        Если оба запроса завершились ошибкой, выбрасывается ошибка первого.
+        """
+        def timed():
+            started = time.perf_counter()
+            try:
+                return function()
+            finally:
+                self.__observe(endpoint, time.perf_counter() - started)
+
+        with self._lock:
+            self._requests += 1
+        self.metrics.incr("requests")
+
+        primary = self._executor.submit(timed)
+        try:
+            return primary.result(timeout=self.delay(endpoint))
+        except FutureTimeoutError:
+            pass
+
+        with self._lock:
+            allowed = self._hedges < self.budget * self._requests
+            if allowed:
+                self._hedges += 1
+        if not allowed:
+            self.metrics.incr("hedges_over_budget")
+            return primary.result()
+
+        self.metrics.incr("hedges")
+        hedge = self._executor.submit(timed)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # Запрос, который уже отправлен, отменить нельзя – его ответ не используется
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        self.metrics.incr("hedge_wins")
+                    return future.result()
+        return primary.result()
+
+    def close(self):
+        """
+        Остановить пул потоков
+        """
+        self._executor.shutdown(wait=False)
+
+    def __observe(self, endpoint: str, latency: float):
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency)
+            count = self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            # Перцентиль пересчитывается каждые 20 замеров, а не на каждый запрос
+            if count % 20 == 0:
+                values = sorted(latencies)
+                index = min(int(len(values) * self.percentile / 100), len(values) - 1)
+                self._delays[endpoint] = max(values[index], self.min_delay)
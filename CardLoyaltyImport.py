@@ -0,0 +1,224 @@
+import argparse
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import CardLoyaltyBasic
+import CardLoyaltyClient
+import CardLoyaltyNormalize
+import functions
+
+# Колонки CSV совпадают с полями клиента в API (см. Request._create_clients)
+COLUMNS = ("lastName", "firstName", "patronymic", "phone", "email", "sex", "birthday",
+           "templateId", "cardNumber", "cardBarcode", "comment", "tags")
+
+
+def normalize_rows(rows: list, tags: dict) -> tuple:
+    """
+    Проверить и привести строки CSV к формату API (выполняется в отдельном процессе)
+
+    :param rows: список пар (номер строки, строка CSV – dict)
+    :param tags: словарь {название тега: ID тега}
+
+    :return: (список троек (номер строки, строка, клиент), список троек (номер строки, строка, причина))
+    """
+    phones = CardLoyaltyNormalize.normalize_phones([row.get("phone") or "" for _, row in rows])
+    card_numbers = CardLoyaltyNormalize.normalize_cards([row.get("cardNumber") or "" for _, row in rows])
+    card_barcodes = CardLoyaltyNormalize.normalize_cards([row.get("cardBarcode") or "" for _, row in rows])
+
+    clients = []
+    rejects = []
+    for (line, row), phone, card_number, card_barcode in zip(rows, phones, card_numbers, card_barcodes):
+        try:
+            clients.append((line, row, normalize_row(row, tags, phone, card_number, card_barcode)))
+        except ValueError as error:
+            rejects.append((line, row, str(error)))
+    return clients, rejects
+
+
+def normalize_row(row: dict, tags: dict, phone: str, card_number: str, card_barcode: str) -> dict:
+    """
+    Привести строку CSV к клиенту для createClients
+
+    :param row: строка CSV
+    :param tags: словарь {название тега: ID тега}
+    :param phone: телефон строки после CardLoyaltyNormalize.normalize_phones
+    :param card_number: номер карты строки после CardLoyaltyNormalize.normalize_cards
+    :param card_barcode: токен/баркод строки после CardLoyaltyNormalize.normalize_cards
+
+    :return: клиент (см. Request._create_clients), ValueError – строка с ошибкой
+    """
+    row = {key: (value or "").strip() for key, value in row.items() if key}
+
+    if phone is None:
+        raise ValueError(f"Неверный телефон: {row.get('phone', '')}")
+    if row.get("cardNumber") and card_number is None:
+        raise ValueError(f"Неверный номер карты: {row.get('cardNumber')}")
+    if row.get("cardBarcode") and card_barcode is None:
+        raise ValueError(f"Неверный баркод: {row.get('cardBarcode')}")
+    sex = row.get("sex") or "0"
+    if sex not in ("0", "1", "2"):
+        raise ValueError(f"Неверный пол: {sex}")
+    template_id = row.get("templateId") or "0"
+    if not template_id.isdigit():
+        raise ValueError(f"Неверный ID макета: {template_id}")
+
+    tag_ids = []
+    for tag in filter(None, (tag.strip() for tag in row.get("tags", "").split(","))):
+        if tag.isdigit():
+            tag_ids.append(int(tag))
+        elif tag in tags:
+            tag_ids.append(int(tags[tag]))
+        else:
+            raise ValueError(f"Неизвестный тег: {tag}")
+
+    return {
+        "lastName": row.get("lastName", ""),
+        "firstName": row.get("firstName", ""),
+        "patronymic": row.get("patronymic", ""),
+        "phone": phone,
+        "email": row.get("email", ""),
+        "sex": int(sex),
+        "birthday": functions.format_birthday(row.get("birthday", "")),
+        "templateId": int(template_id),
+        "cardNumber": card_number or "",
+        "cardBarcode": card_barcode or "",
+        "comment": row.get("comment", ""),
+        "tags": tag_ids
+    }
+
+
+class ClientImport(CardLoyaltyBasic.Basic):
+    def __init__(self,
+                 client: CardLoyaltyClient.LoyaltyClient = None,
+                 batch_size: int = 500,
+                 chunk_size: int = 5000,
+                 processes: int = None,
+                 threads: int = 4,
+                 ):
+        """
+        Инициализация объекта класса ClientImport
+
+        Загрузка клиентов из CSV: строки проверяются в пуле процессов, корректные
+        отправляются пакетами в createClients из пула потоков, остальные пишутся в файл
+        отклоненных строк с причиной. Файл читается потоком, в памяти только текущие части.
+
+        :param client: настройки подключения к API (None – клиент по умолчанию из settings)
+        :param batch_size: количество клиентов в одном запросе createClients
+        :param chunk_size: количество строк CSV в одной задаче процесса
+        :param processes: количество процессов (None – по числу ядер)
+        :param threads: количество одновременных запросов createClients
+        """
+        super().__init__(client)
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.processes = processes or os.cpu_count() or 1
+        self.threads = threads
+
+    def run(self, path: str, rejects_path: str = None, delimiter: str = ",") -> dict:
+        """
+        Загрузить клиентов из CSV
+
+        :param path: файл CSV (UTF-8, первая строка – названия колонок из COLUMNS)
+        :param rejects_path: файл отклоненных строк (None – <path>.rejects.csv)
+        :param delimiter: разделитель колонок
+
+        :return:
+        Пример return:
+        {
+            "rows": 500000,    # строк в файле
+            "created": 499120,    # создано клиентов
+            "rejected": 880    # отклонено строк (см. файл отклоненных строк)
+        }
+        """
+        if rejects_path is None:
+            rejects_path = f"{os.path.splitext(path)[0]}.rejects.csv"
+        tags = {tag.get("tagName"): tag.get("tagId") for tag in (self._get_tags() or {}).get("tags", [])}
+        stats = {"rows": 0, "created": 0, "rejected": 0}
+
+        with open(path, newline="", encoding="utf-8-sig") as source, \
+                open(rejects_path, "w", newline="", encoding="utf-8") as rejects_file, \
+                ProcessPoolExecutor(max_workers=self.processes) as processes, \
+                ThreadPoolExecutor(max_workers=self.threads) as threads:
+            reader = csv.DictReader(source, delimiter=delimiter)
+            fieldnames = list(reader.fieldnames or COLUMNS)
+            rejects = csv.writer(rejects_file, delimiter=delimiter)
+            rejects.writerow(["line", *fieldnames, "reason"])
+
+            def reject(line: int, row: dict, reason: str):
+                stats["rejected"] += 1
+                rejects.writerow([line, *(row.get(key, "") for key in fieldnames), reason])
+
+            normalizing = deque()
+            sending = deque()
+            batch = []
+
+            def send_ready(limit: int):
+                while len(sending) > limit:
+                    self.__count_sent(*sending.popleft(), stats=stats, reject=reject)
+
+            def send(batch_rows: list):
+                clients = [client for _, _, client in batch_rows]
+                sending.append((batch_rows, threads.submit(self._create_clients, clients)))
+                send_ready(self.threads * 2)
+
+            def normalize_ready(limit: int):
+                while len(normalizing) > limit:
+                    clients, rejected = normalizing.popleft().result()
+                    for line, row, reason in rejected:
+                        reject(line, row, reason)
+                    batch.extend(clients)
+                    while len(batch) >= self.batch_size:
+                        send(batch[:self.batch_size])
+                        del batch[:self.batch_size]
+
+            chunk = []
+            for line, row in enumerate(reader, start=2):
+                stats["rows"] += 1
+                chunk.append((line, row))
+                if len(chunk) >= self.chunk_size:
+                    normalizing.append(processes.submit(normalize_rows, chunk, tags))
+                    chunk = []
+                    normalize_ready(self.processes * 2)
+            if chunk:
+                normalizing.append(processes.submit(normalize_rows, chunk, tags))
+            normalize_ready(0)
+            if batch:
+                send(batch)
+            send_ready(0)
+
+        return stats
+
+    @staticmethod
+    def __count_sent(batch_rows: list, future, stats: dict, reject):
+        result = future.result()
+        if not result:
+            for line, row, _ in batch_rows:
+                reject(line, row, "Ошибка запроса createClients")
+            return
+
+        stats["created"] += len(result.get("response", []))
+        rows = {client.get("phone"): (line, row) for line, row, client in batch_rows}
+        for error in result.get("error", []):
+            line, row = rows.get(str(error.get("phone")), (0, {}))
+            reject(line, row, f"{error.get('errorId')}: {error.get('message')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Загрузка клиентов CARDLOYALTY из CSV")
+    parser.add_argument("path", help="файл CSV")
+    parser.add_argument("--rejects", default=None, help="файл отклоненных строк")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    client_import = ClientImport(
+        batch_size=args.batch_size,
+        processes=args.processes,
+        threads=args.threads
+    )
+    print(json.dumps(client_import.run(args.path, args.rejects, args.delimiter), indent=4))
@@ -0,0 +1,154 @@
+import threading
+import time
+
+import CardLoyaltyMetrics
+
+CLIENT_TYPES = ("phone", "cardNumber", "cardBarcode")
+
+
+class Ledger:
+    def __init__(self, max_age: float = 300.00, tolerance: float = 0.01, max_size: int = 100000):
+        """
+        Инициализация объекта класса Ledger
+
+        Бонусный и депозитный балансы клиентов без запроса clientInfo: баланс из clientInfo
+        обновляется суммами созданных заказов (bonusAdd / bonusWriteOff / depositAdd /
+        depositWriteOff) и сверяется с bonusAfter / depositAfter из getNewOrder.
+        Если баланс разошелся с API или старше max_age, он не отдается (нужен clientInfo).
+
+        :param max_age: время жизни баланса в секундах с последнего clientInfo
+        :param tolerance: допустимое расхождение с API (рубли)
+        :param max_size: максимальное количество клиентов (при превышении удаляются самые старые)
+        """
+        self.max_age = max_age
+        self.tolerance = tolerance
+        self.max_size = max_size
+        self.metrics = CardLoyaltyMetrics.Metrics()
+        self._balances = {}
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def get(self, client_id) -> dict:
+        """
+        Получить баланс клиента
+
+        :param client_id: ID клиента
+
+        :return: баланс или None, если его нужно получить из clientInfo
+        Пример return:
+        {
+            "bonusBalance": 125.0,    # Бонусный баланс клиента
+            "depositBalance": 10.0    # Депозитный баланс клиента
+        }
+        """
+        with self._lock:
+            entry = self._balances.get(str(client_id))
+            if entry is None or time.monotonic() - entry["synced"] > self.max_age:
+                self.metrics.incr("ledger_misses")
+                return None
+            self.metrics.incr("ledger_hits")
+            return {"bonusBalance": entry["bonusBalance"], "depositBalance": entry["depositBalance"]}
+
+    def get_client_id(self, type: str, id: str) -> str:
+        """
+        Получить ID клиента по идентификатору из ранее полученного clientInfo
+
+        :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+        :param id: значение поля, указанного в type (в формате API)
+
+        :return: ID клиента или None
+        """
+        if type == "clientId":
+            return str(id)
+        with self._lock:
+            return self._index.get((type, str(id)))
+
+    def set_from_client(self, client: dict):
+        """
+        Записать баланс из clientInfo
+
+        :param client: информация по клиенту (clientId, bonusBalance, depositBalance, ...)
+        """
+        client_id = client.get("clientId")
+        if client_id in (None, ""):
+            return
+        client_id = str(client_id)
+        with self._lock:
+            for client_type in CLIENT_TYPES:
+                if client.get(client_type):
+                    self._index[(client_type, str(client[client_type]))] = client_id
+            previous = self._balances.pop(client_id, None)
+            self._balances[client_id] = {
+                "bonusBalance": self.__to_float(client.get("bonusBalance")),
+                "depositBalance": self.__to_float(client.get("depositBalance")),
+                "synced": time.monotonic(),
+                # Заказы, учтенные до clientInfo, еще могут прийти в getNewOrder
+                "guids": previous["guids"] if previous is not None else [],
+            }
+            while len(self._balances) > self.max_size:
+                self._balances.pop(next(iter(self._balances)))
+            if len(self._index) > self.max_size * len(CLIENT_TYPES):
+                self._index.clear()
+
+    def apply_order(self, client_id, order: dict):
+        """
+        Учесть созданный заказ
+
+        :param client_id: ID клиента
+        :param order: данные заказа (Order.get_to_create_order())
+        """
+        with self._lock:
+            entry = self._balances.get(str(client_id))
+            if entry is None:
+                return
+            entry["bonusBalance"] = round(
+                entry["bonusBalance"] - self.__to_float(order.get("bonusWriteOff"))
+                + self.__to_float(order.get("bonusAdd")), 2
+            )
+            entry["depositBalance"] = round(
+                entry["depositBalance"] - self.__to_float(order.get("depositWriteOff"))
+                + self.__to_float(order.get("depositAdd")), 2
+            )
+            # Последние заказы клиента, учтенные локально (для сверки с getNewOrder)
+            entry["guids"] = entry["guids"][-9:] + [str(order.get("guid"))]
+
+    def apply_feed(self, order: dict):
+        """
+        Сверить баланс с заказом из getNewOrder
+
+        Последний заказ, учтенный через apply_order, сверяется с bonusAfter / depositAfter;
+        заказ, которого нет в apply_order (например, с другой кассы), меняет баланс в API.
+        В обоих случаях при расхождении баланс удаляется и будет заново получен из clientInfo.
+
+        :param order: заказ из getNewOrder (clientId, guid, bonusAfter, depositAfter, ...)
+        """
+        with self._lock:
+            client_id = str(order.get("clientId"))
+            entry = self._balances.get(client_id)
+            guid = str(order.get("guid"))
+            if entry is None or guid in entry["guids"][:-1]:
+                return
+            if guid not in entry["guids"]:
+                self.metrics.incr("ledger_external_orders")
+                self._balances.pop(client_id, None)
+                return
+            if (abs(entry["bonusBalance"] - self.__to_float(order.get("bonusAfter"))) > self.tolerance
+                    or abs(entry["depositBalance"] - self.__to_float(order.get("depositAfter"))) > self.tolerance):
+                self.metrics.incr("ledger_divergence")
+                self._balances.pop(client_id, None)
+
+    def invalidate(self, client_id):
+        """
+        Удалить баланс клиента (следующий запрос баланса – через clientInfo)
+
+        :param client_id: ID клиента
+        """
+        with self._lock:
+            self._balances.pop(str(client_id), None)
+
+    @staticmethod
+    def __to_float(value) -> float:
+        try:
+            return float(value or 0)
+        except (TypeError, ValueError):
+            return 0.00
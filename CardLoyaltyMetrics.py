@@ -0,0 +1,52 @@
+import threading
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Инициализация объекта класса Metrics (потокобезопасные счетчики)
+        """
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1):
+        """
+        Увеличить счетчик
+
+        :param name: название счетчика
+        :param value: на сколько увеличить
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> float:
+        """
+        Получить значение счетчика
+
+        :param name: название счетчика
+
+        :return: значение счетчика (0, если счетчика нет)
+        """
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """
+        Получить значения всех счетчиков
+
+        :return:
+        Пример return:
+        {
+            "bytes_sent": 10240,
+            "bytes_sent_saved": 7168
+        }
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        """
+        Обнулить все счетчики
+        """
+        with self._lock:
+            self._counters.clear()
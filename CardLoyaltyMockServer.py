@@ -0,0 +1,487 @@
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Коды ошибок локального сервера
+ERROR_TOKEN = 700    # Неверный токен
+ERROR_CLIENT_NOT_FOUND = 701    # Клиент не найден
+ERROR_CLIENT_INVALID = 702    # Неверные или неуникальные данные клиента
+ERROR_ORDER_NOT_FOUND = 703    # Заказ не найден
+ERROR_TAG_NOT_FOUND = 704    # Тег не найден
+ERROR_BALANCE = 705    # Недостаточно бонусов / депозита
+ERROR_NO_UPDATES = 715    # Нет обновлений интеграции
+
+CLIENT_TYPES = ("clientId", "cardBarcode", "cardNumber", "phone")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class MockServer:
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 token: str = None,
+                 latency: float = 0.00,
+                 jitter: float = 0.00,
+                 error_rate: float = 0.00,
+                 error_status: int = 500,
+                 clients: int = 0,
+                 seed: int = 0,
+                 ):
+        """
+        Инициализация объекта класса MockServer
+
+        Локальный сервер с методами API CARDLOYALTY для нагрузочного тестирования.
+        Чтобы библиотека работала с ним, укажите его адрес в переменной окружения
+        API (settings.API), например API=http://127.0.0.1:8000
+
+        :param host: адрес
+        :param port: порт (0 – любой свободный)
+        :param token: токен (None – принимать любой токен)
+        :param latency: задержка ответа в секундах
+        :param jitter: случайная добавка к задержке в секундах (от 0 до jitter)
+        :param error_rate: доля запросов, на которые вернется ошибка error_status (от 0 до 1)
+        :param error_status: HTTP статус для внесенных ошибок
+        :param clients: сколько клиентов создать при запуске
+        :param seed: начальное значение генератора случайных чисел
+        """
+        self.token = token
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests_count = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._index = {client_type: {} for client_type in CLIENT_TYPES}
+        self._new_clients = []
+        self._orders = {}
+        self._new_orders = []
+        self._tags = {}
+        self._templates = [
+            {"id": "4", "name": "Скидка 5%"},
+            {"id": "16", "name": "Скидка 10%"},
+            {"id": "18", "name": "Бонусный макет"},
+        ]
+        self._next_client_id = 1
+        self._next_tag_id = 1
+        for i in range(clients):
+            self._add_client({
+                "lastName": f"Фамилия{i}",
+                "firstName": f"Имя{i}",
+                "phone": str(79000000000 + i),
+                "cardNumber": str(100000 + i),
+                "cardBarcode": f"cl{i}",
+            })
+        self._new_clients.clear()
+
+        self._server = _Server((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """
+        Адрес API сервера (значение для settings.API)
+
+        :return: например, "http://127.0.0.1:8000"
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """
+        Запустить сервер в фоновом потоке
+
+        :return: адрес API сервера
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """
+        Остановить сервер
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        """
+        Запустить сервер в текущем потоке
+        """
+        self._server.serve_forever()
+
+    def handle(self, method: str, endpoint: str, params: dict, body) -> tuple:
+        """
+        Обработать запрос к API
+
+        :param method: HTTP метод (GET / POST)
+        :param endpoint: метод API (например, "clientInfo")
+        :param params: параметры запроса
+        :param body: тело запроса (раскодированный JSON)
+
+        :return: (HTTP статус, ответ)
+        """
+        with self._lock:
+            self.requests_count += 1
+            fail = self._random.random() < self.error_rate
+            delay = self.latency + self._random.random() * self.jitter
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            return self.error_status, "Internal Server Error"
+
+        if self.token is not None and params.get("token") != self.token:
+            return 200, self._error(ERROR_TOKEN, "invalid token")
+
+        handler = getattr(self, f"_api_{endpoint}", None)
+        if handler is None:
+            return 404, "Not Found"
+        with self._lock:
+            return 200, handler(params, body if isinstance(body, (dict, list)) else {})
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело ответа уходят одним пакетом (без задержки Nagle / delayed ACK)
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def _dispatch(self, method: str):
+                url = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    body = {}
+
+                status, result = server.handle(method, url.path.rsplit("/", 1)[-1], params, body)
+                if isinstance(result, str):
+                    payload, content_type = result.encode("utf-8"), "text/plain; charset=utf-8"
+                else:
+                    payload, content_type = json.dumps(result, ensure_ascii=False).encode("utf-8"), "application/json"
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if len(payload) > 1024 and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    payload = gzip.compress(payload)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @staticmethod
+    def _error(error_id: int, message: str) -> dict:
+        return {
+            "error": {
+                "errorId": error_id,
+                "message": message
+            }
+        }
+
+    def _find_client(self, params: dict) -> dict:
+        client_type = params.get("type")
+        if client_type not in CLIENT_TYPES:
+            return None
+        client_id = self._index[client_type].get(str(params.get("id")))
+        return self._clients.get(client_id)
+
+    def _add_client(self, data: dict) -> dict:
+        for client_type in ("phone", "cardNumber", "cardBarcode"):
+            value = str(data.get(client_type, ""))
+            if client_type == "phone" and not value:
+                return {"errorId": ERROR_CLIENT_INVALID, "message": "invalid phone"}
+            if value and value in self._index[client_type]:
+                return {"errorId": ERROR_CLIENT_INVALID, "message": f"{client_type} already exists"}
+
+        client_id = self._next_client_id
+        self._next_client_id += 1
+        client = {
+            "clientId": client_id,
+            "hash": "%032x" % self._random.getrandbits(128),
+            "status": 1,
+            "lastName": data.get("lastName", ""),
+            "firstName": data.get("firstName", ""),
+            "patronymic": data.get("patronymic", ""),
+            "phone": str(data.get("phone", "")),
+            "email": data.get("email", ""),
+            "sex": data.get("sex", 0),
+            "birthday": data.get("birthday", ""),
+            "templateId": data.get("templateId") or 4,
+            "cardNumber": str(data.get("cardNumber", "")),
+            "cardBarcode": str(data.get("cardBarcode", "")),
+            "comment": data.get("comment", ""),
+            "tags": list(data.get("tags", [])),
+            "bonusBalance": 500.00,
+            "depositBalance": 0.00,
+            "maxPercentBonusWriteOff": 30,
+            "sumAllDiscount": 0.00,
+        }
+        self._clients[client_id] = client
+        for client_type in CLIENT_TYPES:
+            if client[client_type] != "":
+                self._index[client_type][str(client[client_type])] = client_id
+        self._new_clients.append(client_id)
+        return client
+
+    def _client_list_item(self, client: dict) -> dict:
+        keys = ("clientId", "hash", "status", "lastName", "firstName", "patronymic", "phone", "email",
+                "sex", "birthday", "templateId", "cardNumber", "cardBarcode", "comment", "tags")
+        return {key: client[key] for key in keys}
+
+    def _client_short(self, client: dict) -> dict:
+        return {key: client[key] for key in ("clientId", "phone", "cardNumber", "cardBarcode", "hash")}
+
+    def _template_name(self, template_id) -> str:
+        for template in self._templates:
+            if template["id"] == str(template_id):
+                return template["name"]
+        return ""
+
+    def _api_ping(self, params: dict, body: dict) -> dict:
+        return {"response": {"status": "1", "message": "Token ok"}}
+
+    def _api_clientInfo(self, params: dict, body: dict) -> dict:
+        client = self._find_client(params)
+        if client is None:
+            return self._error(ERROR_CLIENT_NOT_FOUND, "client not found")
+        return {
+            "clientId": client["clientId"],
+            "templateId": client["templateId"],
+            "cardNumber": client["cardNumber"],
+            "cardBarcode": client["cardBarcode"],
+            "phone": client["phone"],
+            "lastName": client["lastName"],
+            "firstName": client["firstName"],
+            "patronymic": client["patronymic"],
+            "email": client["email"],
+            "sex": client["sex"],
+            "birthday": client["birthday"],
+            "templateName": self._template_name(client["templateId"]),
+            "comment": client["comment"],
+            "tags": client["tags"],
+            "bonusBalance": "%.2f" % client["bonusBalance"],
+            "maxPercentBonusWriteOff": str(client["maxPercentBonusWriteOff"]),
+            "depositBalance": "%.2f" % client["depositBalance"],
+            "sumAllDisсount": "%.2f" % client["sumAllDiscount"],
+        }
+
+    def _api_getAllClients(self, params: dict, body: dict) -> dict:
+        limit = int(params.get("limit", 100))
+        offset = int(params.get("offset", 0))
+        ids = list(self._clients)[offset:offset + limit]
+        clients = [self._client_list_item(self._clients[client_id]) for client_id in ids]
+        return {"clients": clients or None}
+
+    def _api_getNewClients(self, params: dict, body: dict) -> dict:
+        limit = int(params.get("limit", 100))
+        ids, self._new_clients = self._new_clients[:limit], self._new_clients[limit:]
+        clients = [self._client_list_item(self._clients[client_id]) for client_id in ids]
+        return {"clients": clients or None}
+
+    def _api_createClients(self, params: dict, body: dict) -> dict:
+        result = {}
+        for data in body.get("clients", []):
+            client = self._add_client(data)
+            if "errorId" in client:
+                error = {key: data.get(key, "") for key in ("phone", "cardNumber", "cardBarcode")}
+                error.update(client)
+                result.setdefault("error", []).append(error)
+            else:
+                result.setdefault("response", []).append(self._client_short(client))
+        return result
+
+    def _api_updateClients(self, params: dict, body: dict) -> dict:
+        result = {}
+        for data in body.get("clients", []):
+            client = self._clients.get(data.get("clientId"))
+            if client is None:
+                result.setdefault("error", []).append({
+                    "clientId": data.get("clientId"),
+                    "errorId": ERROR_CLIENT_NOT_FOUND,
+                    "message": "client not found"
+                })
+                continue
+            for client_type in ("phone", "cardNumber", "cardBarcode"):
+                if client_type in data:
+                    self._index[client_type].pop(str(client[client_type]), None)
+                    self._index[client_type][str(data[client_type])] = client["clientId"]
+            client.update({key: value for key, value in data.items() if key in client})
+            result.setdefault("response", []).append(
+                {key: client[key] for key in ("clientId", "phone", "cardNumber", "cardBarcode")}
+            )
+        return result
+
+    def _api_updateVars(self, params: dict, body: dict) -> dict:
+        for data in body.get("clients", []):
+            if data.get("clientId") not in self._clients:
+                return self._error(ERROR_CLIENT_NOT_FOUND, "client not found")
+        return {"response": "ok"}
+
+    def _api_getTags(self, params: dict, body: dict) -> dict:
+        return {"tags": [{"tagId": tag_id, "tagName": name} for tag_id, name in self._tags.items()]}
+
+    def _api_getTag(self, params: dict, body: dict) -> dict:
+        try:
+            tag_id = int(params.get("id"))
+        except (TypeError, ValueError):
+            tag_id = None
+        if tag_id not in self._tags:
+            return self._error(ERROR_TAG_NOT_FOUND, "tag not found")
+        return {"tagName": self._tags[tag_id]}
+
+    def _api_createTags(self, params: dict, body: dict) -> list:
+        result = []
+        for name in body.get("tags", []):
+            tag_id = next((key for key, value in self._tags.items() if value == name), None)
+            if tag_id is None:
+                tag_id = self._next_tag_id
+                self._next_tag_id += 1
+                self._tags[tag_id] = name
+                result.append({"name": name, "id": str(tag_id), "status": "new"})
+            else:
+                result.append({"name": name, "id": str(tag_id), "status": "exists"})
+        return result
+
+    def _api_getTemplates(self, params: dict, body: dict) -> list:
+        return list(self._templates)
+
+    def _api_sendCardSMS(self, params: dict, body: dict) -> dict:
+        if body.get("clientId") not in self._clients:
+            return self._error(ERROR_CLIENT_NOT_FOUND, "client not found")
+        return {"response": "ok"}
+
+    def _api_updateRegistrationOrganisation(self, params: dict, body: dict) -> dict:
+        return {"response": {"message": "Registration successful.", "status": "1"}}
+
+    def _api_getUpdateIntegration(self, params: dict, body: dict) -> dict:
+        return {
+            "integrationSoftName": body.get("integrationSoftName", ""),
+            "versionIntegrationSoft": body.get("versionIntegrationSoft", ""),
+            "update": None,
+            "error": {"errorId": ERROR_NO_UPDATES, "message": "No updates"}
+        }
+
+    def _api_getNewOrder(self, params: dict, body: dict) -> dict:
+        limit = int(params.get("limit", 100))
+        guids, self._new_orders = self._new_orders[:limit], self._new_orders[limit:]
+        return {"newOrder": [self._orders[guid] for guid in guids]}
+
+    def _save_order(self, params: dict, body: dict, update: bool) -> dict:
+        client = self._find_client(params)
+        if client is None:
+            return self._error(ERROR_CLIENT_NOT_FOUND, "client not found")
+        guid = str(body.get("guid", ""))
+        previous = self._orders.get(guid)
+        if update and previous is None:
+            return self._error(ERROR_ORDER_NOT_FOUND, "order not found")
+
+        bonus = client["bonusBalance"]
+        deposit = client["depositBalance"]
+        if previous is not None:
+            bonus += float(previous["bonusWriteOff"]) - float(previous["bonusAdd"])
+            deposit += float(previous["depositWriteOff"]) - float(previous["depositAdd"])
+        bonus_write_off = float(body.get("bonusWriteOff", 0))
+        deposit_write_off = float(body.get("depositWriteOff", 0))
+        if bonus_write_off > bonus + 0.001 or deposit_write_off > deposit + 0.001:
+            return self._error(ERROR_BALANCE, "insufficient balance")
+
+        client["bonusBalance"] = round(bonus - bonus_write_off + float(body.get("bonusAdd", 0)), 2)
+        client["depositBalance"] = round(deposit - deposit_write_off + float(body.get("depositAdd", 0)), 2)
+        client["sumAllDiscount"] = round(client["sumAllDiscount"] + float(body.get("sumDiscount", 0)), 2)
+        self._orders[guid] = {
+            "clientId": client["clientId"],
+            "guid": guid,
+            "number": body.get("number", ""),
+            "date": body.get("date", ""),
+            "sum": float(body.get("sum", 0)),
+            "sumDiscount": float(body.get("sumDiscount", 0)),
+            "bonusAdd": float(body.get("bonusAdd", 0)),
+            "bonusWriteOff": bonus_write_off,
+            "bonusAfter": client["bonusBalance"],
+            "depositAdd": float(body.get("depositAdd", 0)),
+            "depositWriteOff": deposit_write_off,
+            "depositAfter": client["depositBalance"],
+        }
+        self._new_orders.append(guid)
+        return {"response": {"guid": guid}}
+
+    def _api_createOrder(self, params: dict, body: dict) -> dict:
+        return self._save_order(params, body, update=False)
+
+    def _api_updateOrder(self, params: dict, body: dict) -> dict:
+        return self._save_order(params, body, update=True)
+
+    def _api_returnOrder(self, params: dict, body: dict) -> dict:
+        guid = str(body.get("guid", ""))
+        order = self._orders.pop(guid, None)
+        if order is None:
+            return self._error(ERROR_ORDER_NOT_FOUND, "order not found")
+        if guid in self._new_orders:
+            self._new_orders.remove(guid)
+        client = self._clients[order["clientId"]]
+        client["bonusBalance"] = round(client["bonusBalance"] + order["bonusWriteOff"] - order["bonusAdd"], 2)
+        client["depositBalance"] = round(client["depositBalance"] + order["depositWriteOff"] - order["depositAdd"], 2)
+        return {"response": {"guid": guid}}
+
+    def _api_returnCart(self, params: dict, body: dict) -> dict:
+        if self._find_client(params) is None:
+            return self._error(ERROR_CLIENT_NOT_FOUND, "client not found")
+        return {"response": {"guid": str(body.get("guid", ""))}}
+
+    def _api_updateReturnCart(self, params: dict, body: dict) -> dict:
+        return self._api_returnCart(params, body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локальный сервер API CARDLOYALTY")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--latency", type=float, default=0.00)
+    parser.add_argument("--jitter", type=float, default=0.00)
+    parser.add_argument("--error-rate", type=float, default=0.00)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=1000)
+    args = parser.parse_args()
+
+    mock_server = MockServer(
+        host=args.host,
+        port=args.port,
+        token=args.token,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        clients=args.clients
+    )
+    print(f"API={mock_server.url}", flush=True)
+    mock_server.serve_forever()
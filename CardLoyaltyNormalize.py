@@ -0,0 +1,105 @@
+import re
+
+# Разделители, которые допускаются во вводе и удаляются (пробелы, скобки, дефисы, точки, "+")
+PHONE_DELIMITERS = re.compile(r"[ \t()\-.+]")
+# 7XXXXXXXXXX, 8XXXXXXXXXX или XXXXXXXXXX (10 цифр без кода страны)
+PHONE = re.compile(r"[78]?(\d{10})")
+CARD_DELIMITERS = re.compile(r"[ \t\-]")
+# Номер карты и токен/баркод – только латиница и цифры
+CARD = re.compile(r"[A-Za-z0-9]+")
+CLIENT_ID = re.compile(r"\d+")
+
+# Разделитель значений при пакетной обработке (не встречается во вводе)
+SEPARATOR = "\x00"
+
+
+def normalize_phone(phone) -> str:
+    """
+    Привести телефон к формату API
+
+    :param phone: телефон (например, "+7 (916) 123-45-67", "89161234567", 79161234567)
+
+    :return: телефон в формате 7XXXXXXXXXX или None, если телефон неверный
+    Пример return: "79161234567"
+    """
+    match = PHONE.fullmatch(PHONE_DELIMITERS.sub("", str(phone).strip()))
+    return "7" + match.group(1) if match else None
+
+
+def normalize_card(card) -> str:
+    """
+    Привести номер карты или токен/баркод к формату API
+
+    :param card: номер карты или токен/баркод (пробелы и дефисы удаляются)
+
+    :return: значение только из латиницы и цифр или None, если значение неверное
+    Пример return: "1040482"
+    """
+    card = CARD_DELIMITERS.sub("", str(card).strip())
+    return card if CARD.fullmatch(card) else None
+
+
+def normalize_client_id(client_id) -> str:
+    """
+    Привести ID клиента к формату API
+
+    :param client_id: ID клиента
+
+    :return: ID клиента (строка из цифр) или None, если ID неверный
+    Пример return: "377308"
+    """
+    client_id = str(client_id).strip()
+    return client_id if CLIENT_ID.fullmatch(client_id) else None
+
+
+NORMALIZERS = {
+    "clientId": normalize_client_id,
+    "phone": normalize_phone,
+    "cardNumber": normalize_card,
+    "cardBarcode": normalize_card,
+}
+
+
+def normalize(type: str, id) -> str:
+    """
+    Привести идентификатор клиента к формату API
+
+    :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+    :param id: значение поля, указанного в type
+
+    :return: значение в формате API или None, если значение неверное
+    """
+    normalizer = NORMALIZERS.get(type)
+    return normalizer(id) if normalizer is not None else None
+
+
+def normalize_phones(phones: list) -> list:
+    """
+    Привести список телефонов к формату API (для загрузки клиентов)
+
+    Разделители удаляются одним проходом по всему списку, а не по каждому телефону.
+
+    :param phones: список телефонов
+
+    :return: список телефонов в формате 7XXXXXXXXXX (None – телефон неверный)
+    Пример return: ["79161234567", None, "79031234567"]
+    """
+    fullmatch = PHONE.fullmatch
+    cleaned = PHONE_DELIMITERS.sub("", SEPARATOR.join(map(str, phones))).split(SEPARATOR)
+    return [
+        "7" + match.group(1) if match else None
+        for match in map(fullmatch, (phone.strip() for phone in cleaned))
+    ] if phones else []
+
+
+def normalize_cards(cards: list) -> list:
+    """
+    Привести список номеров карт или токенов/баркодов к формату API (для загрузки клиентов)
+
+    :param cards: список номеров карт или токенов/баркодов
+
+    :return: список значений только из латиницы и цифр (None – значение неверное)
+    """
+    fullmatch = CARD.fullmatch
+    cleaned = CARD_DELIMITERS.sub("", SEPARATOR.join(map(str, cards))).split(SEPARATOR)
+    return [card if fullmatch(card) else None for card in (card.strip() for card in cleaned)] if cards else []
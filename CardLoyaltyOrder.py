@@ -1,10 +1,13 @@
 from datetime import datetime
 
-import CardLoyaltyBasic
 import CardLoyaltyBasket
+import CardLoyaltyBonus
+import CardLoyaltySerializer
 
 
-class Order(CardLoyaltyBasic.Basic):
+class Order:
+    __slots__ = ("_basket", "_date", "_fields", "_order", "_order_json", "_order_version")
+
     def __init__(self,
                  guid: str,
                  number: str,
@@ -26,21 +29,22 @@ class Order(CardLoyaltyBasic.Basic):
         :param bonus_write_off: списано бонусов
         :param deposit_add: пополнение депозита
         :param deposit_write_off: списание с депозита
+
+        Заказ – только данные, без состояния для запросов к API.
         """
-        super().__init__()
         self._basket = basket
-        self._order = {
+        self._date = date
+        self._fields = {
             "guid": guid,    # ID транзакции
             "number": number,    # Номер транзакции
-            "date": date.strftime("%Y-%m-%d %H:%M:%S"),    # Дата транзакции
-            "sum": basket.get_basket_price(),    # Сумма транзакции без скидки
-            "sumDiscount": basket.get_basket_price_with_discount(),    # Сумма транзакции со скидкой
             "bonusAdd": round(bonus_add, 2),    # Начислено бонусов
             "bonusWriteOff": round(bonus_write_off, 2),    # Списано бонусов
             "depositAdd": round(deposit_add, 2),    # Пополнение депозита
             "depositWriteOff": round(deposit_write_off, 2),    # Списание с депозита
-            "cart": basket.get_basket_for_order()
         }
+        self._order = None
+        self._order_json = None
+        self._order_version = None
 
     def get_order_basket(self) -> CardLoyaltyBasket.Basket:
         """
@@ -56,7 +60,7 @@ class Order(CardLoyaltyBasic.Basic):
 
         :return: float
         """
-        return self._order["sum"]
+        return self.get_to_create_order()["sum"]
 
     def get_order_price_with_discount(self) -> float:
         """
@@ -64,7 +68,34 @@ class Order(CardLoyaltyBasic.Basic):
 
         :return: float
         """
-        return self._order["sumDiscount"]
+        return self.get_to_create_order()["sumDiscount"]
+
+    def get_cart_write_off(self) -> dict:
+        """
+        Получить распределение списания бонусов и депозита по позициям корзины
+
+        :return:
+        Пример return:
+        {
+            "84": {    # ID товара
+                "bonusWriteOff": 12.35,    # Списано бонусов на позицию
+                "depositWriteOff": 0.0    # Списано с депозита на позицию
+            },
+            "97": {
+                "bonusWriteOff": 7.65,
+                "depositWriteOff": 0.0
+            }
+        }
+        """
+        bonus = CardLoyaltyBonus.Bonus.distribute(self._basket, self._fields["bonusWriteOff"])
+        deposit = CardLoyaltyBonus.Bonus.distribute(self._basket, self._fields["depositWriteOff"])
+        return {
+            nid: {
+                "bonusWriteOff": bonus[nid],
+                "depositWriteOff": deposit[nid]
+            }
+            for nid in bonus
+        }
 
     def get_to_create_order(self) -> dict:
         """
@@ -104,4 +135,38 @@ class Order(CardLoyaltyBasic.Basic):
             ]
         }
         """
+        if self._order is None or self._order_version != self._basket.get_version():
+            self._order = self._build_order()
+            self._order_json = None
+            self._order_version = self._basket.get_version()
         return self._order
+
+    def get_to_create_order_json(self, serializer: CardLoyaltySerializer.Serializer = None) -> bytes:
+        """
+        Возвращает данные заказа в формате для создания заказа, закодированные в JSON
+
+        Результат кэшируется до изменения корзины и передается в транспорт
+        без повторного кодирования.
+
+        :param serializer: сериализатор (по умолчанию - самый быстрый из доступных)
+
+        :return: bytes (UTF-8)
+        """
+        order = self.get_to_create_order()
+        if self._order_json is None:
+            if serializer is None:
+                serializer = CardLoyaltySerializer.get_serializer()
+            self._order_json = serializer.dumps(order)
+        return self._order_json
+
+    def _build_order(self) -> dict:
+        order = {
+            "guid": self._fields["guid"],    # ID транзакции
+            "number": self._fields["number"],    # Номер транзакции
+            "date": self._date.strftime("%Y-%m-%d %H:%M:%S"),    # Дата транзакции
+            "sum": self._basket.get_basket_price(),    # Сумма транзакции без скидки
+            "sumDiscount": self._basket.get_basket_price_with_discount(),    # Сумма транзакции со скидкой
+        }
+        order.update(self._fields)
+        order["cart"] = self._basket.get_basket_for_order()
+        return order
@@ -1,13 +1,55 @@
+import copy
 import json
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
 import CardLoyaltyBasic
+import CardLoyaltyBasket
+import CardLoyaltyBloom
+import CardLoyaltyBonus
+import CardLoyaltyCache
+import CardLoyaltyClient
+import CardLoyaltyLedger
+import CardLoyaltyNormalize
 import CardLoyaltyOrder
+import CardLoyaltyPricing
+import functions
+
+CLIENT_TYPES = ("clientId", "phone", "cardNumber", "cardBarcode")
 
 
 class Organization(CardLoyaltyBasic.Basic):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client: CardLoyaltyClient.LoyaltyClient = None, cache: CardLoyaltyCache.Cache = None,
+                 negative_ttl: float = 30.00, max_prefetches: int = 32,
+                 ledger: CardLoyaltyLedger.Ledger = None, not_found_error_id: int = None):
+        """
+        Инициализация объекта класса Organization
+
+        Объект потокобезопасен: один экземпляр можно использовать из всех потоков
+        сервера кассы, создавать Organization на каждый запрос не нужно.
+
+        :param client: настройки подключения к API (None – клиент по умолчанию из settings)
+        :param cache: кэш информации по клиентам (по умолчанию - свой кэш на 60 секунд)
+        :param negative_ttl: сколько секунд помнить, что клиента нет (0 – не помнить)
+        :param max_prefetches: максимальное количество незабранных предзагрузок (см. prefetch_client)
+        :param ledger: балансы клиентов с учетом созданных заказов (по умолчанию - свой на 5 минут)
+        :param not_found_error_id: errorId ответа clientInfo "клиент не найден". В документации API
+                                   код не указан – задайте его по ответам своего API (у локального
+                                   CardLoyaltyMockServer – ERROR_CLIENT_NOT_FOUND). None – отсутствующие
+                                   клиенты не запоминаются; другие ошибки API не запоминаются никогда
+        """
+        super().__init__(client)
+        self._cache = cache if cache is not None else CardLoyaltyCache.Cache()
+        self._missing = CardLoyaltyCache.Cache(ttl=negative_ttl)
+        self._bloom = None
+        self._bloom_expires = 0.00
+        self.max_prefetches = max_prefetches
+        self.not_found_error_id = not_found_error_id
+        self._prefetches = OrderedDict()
+        self._lock = threading.Lock()
+        self._ledger = ledger if ledger is not None else CardLoyaltyLedger.Ledger()
 
     def add_client(self,
                    first_name: str,
@@ -28,7 +70,7 @@ class Organization(CardLoyaltyBasic.Basic):
 
         :param first_name: фамилия
         :param last_name: имя
-        :param phone: телефон (уникальный)
+        :param phone: телефон (уникальный, "+7 (916) 123-45-67" и "89161234567" приводятся к 79161234567)
         :param card_number: номер карты (уникальный)
         :param card_barcode: токен или баркод (только латиница и цифры)
 
@@ -59,12 +101,25 @@ class Organization(CardLoyaltyBasic.Basic):
             "message": "invalid ..."    # Сообщение
         }
 
-        В остальных случаях: {}
+        В остальных случаях (в том числе неверный телефон, номер карты или баркод): {}
         """
-        if isinstance(birthday, datetime):
-            birthday_format = birthday.strftime("%Y-%m-%d")
-        else:
-            birthday_format = birthday
+        try:
+            birthday_format = functions.format_birthday(birthday)
+        except ValueError as error:
+            print(error)
+            return {}
+
+        phone = self._normalize_id("phone", phone)
+        if phone is None:
+            return {}
+        if card_number:
+            card_number = self._normalize_id("cardNumber", card_number)
+            if card_number is None:
+                return {}
+        if card_barcode:
+            card_barcode = self._normalize_id("cardBarcode", card_barcode)
+            if card_barcode is None:
+                return {}
 
         new_client = {
             "lastName": last_name,
@@ -85,12 +140,214 @@ class Organization(CardLoyaltyBasic.Basic):
         )
 
         if "response" in result:
-            return result.get("response").pop()
+            new_client = result.get("response").pop()
+            self._register_client(new_client)
+            return new_client
         elif "error" in result:
             return result.get("error").pop()
         else:
             return {}
 
+    def build_order(self,
+                    type: str,
+                    id: str,
+                    guid: str,
+                    number: str,
+                    date: datetime,
+                    basket: CardLoyaltyBasket.Basket,
+                    bonus_add: float = 0.00,
+                    bonus_write_off: float = None,
+                    deposit_add: float = 0.00,
+                    deposit_write_off: float = None,
+                    use_cache: bool = True,
+                    ) -> CardLoyaltyOrder.Order:
+        """
+        Создать заказ с рассчитанным списанием бонусов и депозита
+
+        Информация по клиенту запрашивается один раз (или берется из кэша),
+        списание ограничивается балансами клиента и maxPercentBonusWriteOff.
+        Распределение списания по позициям: Order.get_cart_write_off()
+
+        :param type: параметр транзакции. Возможные значения:
+                clientId – ID клиента
+                cardBarcode – Токен/Баркод карты
+                cardNumber – Номер карты
+                phone – Телефон
+        :param id: значение поля, указанного в type
+        :param guid: ID транзакции
+        :param number: номер транзакции
+        :param date: дата транзакции
+        :param basket: корзина заказа
+
+        :param (необязат.) bonus_add: начислено бонусов
+        :param (необязат.) bonus_write_off: списать бонусов (None – максимально допустимое)
+        :param (необязат.) deposit_add: пополнение депозита
+        :param (необязат.) deposit_write_off: списать с депозита (None – максимально допустимое)
+        :param (необязат.) use_cache: брать информацию по клиенту из кэша
+
+        :return: объект класса CardLoyaltyOrder.Order
+        """
+        client = self._get_client(type=type, id=id, use_cache=use_cache)
+        bonus_write_off, deposit_write_off = self.__write_offs(client, basket, bonus_write_off, deposit_write_off)
+
+        return CardLoyaltyOrder.Order(
+            guid=guid,
+            number=number,
+            date=date,
+            basket=basket,
+            bonus_add=bonus_add,
+            bonus_write_off=bonus_write_off,
+            deposit_add=deposit_add,
+            deposit_write_off=deposit_write_off
+        )
+
+    def checkout(self,
+                 type: str,
+                 id: str,
+                 guid: str,
+                 number: str,
+                 date: datetime,
+                 basket: CardLoyaltyBasket.Basket,
+                 pricing: CardLoyaltyPricing.Pricing = None,
+                 bonus_add: float = 0.00,
+                 bonus_write_off: float = None,
+                 deposit_add: float = 0.00,
+                 deposit_write_off: float = None,
+                 use_cache: bool = True,
+                 ) -> dict:
+        """
+        Провести заказ одним вызовом: клиент, цены, списание бонусов, заказ, отправка в API
+
+        Информация по клиенту запрашивается (или берется из кэша / предзагрузки, см.
+        prefetch_client) одновременно с расчетом цен корзины и получением макетов
+        (кэш макетов – client.stale_policy["getTemplates"]). Если макет клиента скидочный
+        (см. Pricing.add_template_discount), цены пересчитываются с его процентом. Балансы – с учетом Ledger.
+
+        :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+        :param id: значение поля, указанного в type
+        :param guid: ID транзакции
+        :param number: номер транзакции
+        :param date: дата транзакции
+        :param basket: корзина заказа
+
+        :param (необязат.) pricing: правила скидок (объект класса CardLoyaltyPricing.Pricing, не изменяется)
+        :param (необязат.) bonus_add: начислено бонусов
+        :param (необязат.) bonus_write_off: списать бонусов (None – максимально допустимое)
+        :param (необязат.) deposit_add: пополнение депозита
+        :param (необязат.) deposit_write_off: списать с депозита (None – максимально допустимое)
+        :param (необязат.) use_cache: брать информацию по клиенту из кэша
+
+        :return:
+        Пример return:
+        {
+            "result": {"guid": "123"},    # ответ create_order_by_* ({} – клиент не найден или ошибка)
+            "order": Order,    # объект класса CardLoyaltyOrder.Order (None – клиент не найден)
+            "client": {...},    # информация по клиенту
+            "timings": {    # время этапов в миллисекундах
+                "client": 41.2,    # получение клиента
+                "templates": 0.1,    # получение макетов (параллельно с клиентом)
+                "pricing": 2.8,    # расчет цен корзины (параллельно с клиентом)
+                "repricing": 2.7,    # пересчет цен со скидкой макета клиента (если есть)
+                "bonus": 0.2,    # расчет списания бонусов и депозита
+                "build": 0.4,    # сборка заказа
+                "submit": 38.5,    # отправка заказа в API
+                "total": 81.0
+            }
+        }
+        """
+        timings = {}
+        started = time.perf_counter()
+
+        def timed(stage: str, function, *args):
+            stage_started = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                timings[stage] = round((time.perf_counter() - stage_started) * 1000, 3)
+
+        # Клиент запрашивается в текущем потоке, цены и макеты – в пуле потоков клиента.
+        # Если задачи пула еще не начались к моменту ответа API, они выполняются здесь же.
+        if pricing:
+            templates = self.client.executor.submit(timed, "templates", self.__get_templates)
+            prices = self.client.executor.submit(timed, "pricing", basket.apply_pricing, pricing)
+        client = timed("client", self._get_client, type, id, use_cache)
+
+        if pricing:
+            if templates.cancel():
+                templates = timed("templates", self.__get_templates)
+            else:
+                templates = templates.result()
+            # Расчет в пуле мог начаться – дожидаемся его, чтобы не менять корзину одновременно
+            priced = not prices.cancel()
+            if priced:
+                prices.result()
+            template_pricing = copy.copy(pricing)
+            if template_pricing.add_template_discount(client.get("templateId"), templates) or not priced:
+                timed("repricing" if priced else "pricing", basket.apply_pricing, template_pricing)
+
+        if not client:
+            timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+            return {"result": {}, "order": None, "client": {}, "timings": timings}
+
+        bonus_write_off, deposit_write_off = timed(
+            "bonus", self.__write_offs, client, basket, bonus_write_off, deposit_write_off
+        )
+        order = timed("build", self.__make_order, guid, number, date, basket, bonus_add, bonus_write_off,
+                      deposit_add, deposit_write_off)
+
+        create_order = {
+            "clientId": self.create_order_by_client_id,
+            "cardBarcode": self.create_order_by_barcode,
+            "cardNumber": self.create_order_by_card,
+            "phone": self.create_order_by_phone,
+        }[type]
+        result = timed("submit", create_order, id, order)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 3)
+        return {"result": result, "order": order, "client": client, "timings": timings}
+
+    def __get_templates(self) -> list:
+        # Макеты меняются редко: кэш stale-while-revalidate, если он настроен, иначе кэш клиентов
+        if "getTemplates" in self.client.stale_policy:
+            return self._stale_read("getTemplates", (), self._get_templates)
+        templates = self._cache.get(("getTemplates",))
+        if templates is None:
+            templates = self._get_templates()
+            if templates:
+                self._cache.set(("getTemplates",), templates)
+        return templates
+
+    def __make_order(self, guid: str, number: str, date: datetime, basket: CardLoyaltyBasket.Basket,
+                     bonus_add: float, bonus_write_off: float, deposit_add: float,
+                     deposit_write_off: float) -> CardLoyaltyOrder.Order:
+        order = CardLoyaltyOrder.Order(
+            guid=guid,
+            number=number,
+            date=date,
+            basket=basket,
+            bonus_add=bonus_add,
+            bonus_write_off=bonus_write_off,
+            deposit_add=deposit_add,
+            deposit_write_off=deposit_write_off
+        )
+        # Тело запроса кэшируется в заказе – сериализация входит в этап сборки
+        order.get_to_create_order_json(self.serializer)
+        return order
+
+    @staticmethod
+    def __write_offs(client: dict, basket: CardLoyaltyBasket.Basket, bonus_write_off: float,
+                     deposit_write_off: float) -> tuple:
+        bonus = CardLoyaltyBonus.Bonus(client)
+
+        max_bonus = bonus.get_max_bonus_write_off(basket)
+        if bonus_write_off is None or bonus_write_off > max_bonus:
+            bonus_write_off = max_bonus
+
+        max_deposit = bonus.get_max_deposit_write_off(basket, bonus_write_off)
+        if deposit_write_off is None or deposit_write_off > max_deposit:
+            deposit_write_off = max_deposit
+
+        return max(bonus_write_off, 0.00), max(deposit_write_off, 0.00)
+
     def create_order_by_client_id(self, client_id: int, order: CardLoyaltyOrder.Order) -> dict:
         """
         Создать заказ по ID клиента
@@ -107,10 +364,11 @@ class Organization(CardLoyaltyBasic.Basic):
         result = self._create_order(
             type="clientId",
             id=str(client_id),
-            order=order.get_to_create_order()
+            order=order.get_to_create_order_json(self.serializer)
         )
 
         if "response" in result:
+            self.__apply_order("clientId", str(client_id), order)
             return result.get("response")
         elif "error" in result:
             return result.get("error")
@@ -133,10 +391,11 @@ class Organization(CardLoyaltyBasic.Basic):
         result = self._create_order(
             type="cardBarcode",
             id=card_barcode,
-            order=order.get_to_create_order()
+            order=order.get_to_create_order_json(self.serializer)
         )
 
         if "response" in result:
+            self.__apply_order("cardBarcode", card_barcode, order)
             return result.get("response")
         elif "error" in result:
             return result.get("error")
@@ -158,10 +417,11 @@ class Organization(CardLoyaltyBasic.Basic):
         result = self._create_order(
             type="cardNumber",
             id=card_number,
-            order=order.get_to_create_order()
+            order=order.get_to_create_order_json(self.serializer)
         )
 
         if "response" in result:
+            self.__apply_order("cardNumber", card_number, order)
             return result.get("response")
         elif "error" in result:
             return result.get("error")
@@ -183,10 +443,11 @@ class Organization(CardLoyaltyBasic.Basic):
         result = self._create_order(
             type="phone",
             id=phone,
-            order=order.get_to_create_order()
+            order=order.get_to_create_order_json(self.serializer)
         )
 
         if "response" in result:
+            self.__apply_order("phone", phone, order)
             return result.get("response")
         elif "error" in result:
             return result.get("error")
@@ -250,6 +511,22 @@ class Organization(CardLoyaltyBasic.Basic):
         else:
             return []
 
+    def iter_all_clients(self, limit: int = 100, offset: int = 0):
+        """
+        Получить всех клиентов по одному, не загружая весь ответ в память
+
+        :param limit: по сколько клиентов возвращать
+        :param offset: смещение (например, смещение 2 - будет передан 3 и 4 клиент)
+
+        :return: генератор клиентов (формат клиента как в get_all_clients)
+        При ошибке API генератор выбрасывает ValueError.
+        """
+        return self._get_clients_all(
+            limit=limit,
+            offset=offset,
+            stream=True
+        )
+
     def get_client_by_id(self, client_id: int) -> dict:
         """
         Получить информацию по клиенту по ID клиента
@@ -279,11 +556,10 @@ class Organization(CardLoyaltyBasic.Basic):
             "sumAllDisсount": "1200.00"    # Сумма всех визитов с учетом скидок
         }
         """
-        client = self._client_info(
+        return self._get_client(
             type="clientId",
             id=str(client_id)
         )
-        return client if client else {}
 
     def get_client_by_barcode(self, card_barcode: str) -> dict:
         """
@@ -314,11 +590,10 @@ class Organization(CardLoyaltyBasic.Basic):
             "sumAllDisсount": "1200.00"    # Сумма всех визитов с учетом скидок
         }
         """
-        client = self._client_info(
+        return self._get_client(
             type="cardBarcode",
             id=card_barcode
         )
-        return client if client else {}
 
     def get_client_by_card(self, card_number: str) -> dict:
         """
@@ -349,11 +624,10 @@ class Organization(CardLoyaltyBasic.Basic):
             "sumAllDisсount": "1200.00"    # Сумма всех визитов с учетом скидок
         }
         """
-        client = self._client_info(
+        return self._get_client(
             type="cardNumber",
             id=card_number
         )
-        return client if client else {}
 
     def get_client_by_phone(self, phone: str) -> dict:
         """
@@ -384,11 +658,10 @@ class Organization(CardLoyaltyBasic.Basic):
             "sumAllDisсount": "1200.00"    # Сумма всех визитов с учетом скидок
         }
         """
-        client = self._client_info(
+        return self._get_client(
             type="phone",
             id=phone
         )
-        return client if client else {}
 
     def get_new_clients(self, limit: int = 100) -> list:
         """
@@ -441,10 +714,25 @@ class Organization(CardLoyaltyBasic.Basic):
             limit=limit,
         )
         if "clients" in clients:
+            for client in clients.get("clients") or []:
+                self._register_client(client)
             return clients.get("clients")
         else:
             return []
 
+    def iter_new_clients(self, limit: int = 100):
+        """
+        Получить только новых клиентов по одному, не загружая весь ответ в память
+
+        :param limit: по сколько клиентов возвращать
+
+        :return: генератор клиентов (формат клиента как в get_new_clients)
+        При ошибке API генератор выбрасывает ValueError.
+        """
+        for client in self._get_clients_new(limit=limit, stream=True):
+            self._register_client(client)
+            yield client
+
     def get_new_orders(self, limit: int = 100) -> list:
         """
         Получить новые заказы
@@ -486,6 +774,8 @@ class Organization(CardLoyaltyBasic.Basic):
         """
         result = self._get_orders_new(limit)
         if "newOrder" in result:
+            for order in result.get("newOrder") or []:
+                self._ledger.apply_feed(order)
             return result.get("newOrder")
         else:
             return []
@@ -643,15 +933,253 @@ class Organization(CardLoyaltyBasic.Basic):
 
         В остальных случаях: {}
         """
+        for client_type in ("phone", "cardNumber", "cardBarcode"):
+            if client_info.get(client_type):
+                client_info[client_type] = self._normalize_id(client_type, client_info[client_type])
+                if client_info[client_type] is None:
+                    return {}
         client_info.update({'clientId': client_id})
         result = self._update_clients([client_info])
         if "response" in result:
-            return result.get("response").pop()
+            updated_client = result.get("response").pop()
+            self._register_client(dict(client_info, **updated_client))
+            return updated_client
         elif "error" in result:
             return result.get("error").pop()
         else:
             return {}
 
+    def get_balance(self, type: str, id: str) -> dict:
+        """
+        Получить бонусный и депозитный баланс клиента
+
+        Баланс берется из Ledger (clientInfo + суммы созданных заказов) без запроса к API;
+        clientInfo запрашивается, если баланса нет, он устарел или разошелся с getNewOrder.
+
+        :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+        :param id: значение поля, указанного в type
+
+        :return:
+        Пример return:
+        {
+            "bonusBalance": 125.0,    # Бонусный баланс клиента
+            "depositBalance": 10.0    # Депозитный баланс клиента
+        }
+
+        Клиент не найден: {}
+        """
+        normalized = CardLoyaltyNormalize.normalize(type, id)
+        client_id = self._ledger.get_client_id(type, normalized) if normalized is not None else None
+        balance = self._ledger.get(client_id) if client_id is not None else None
+        if balance is not None:
+            return balance
+
+        client = self._get_client(type=type, id=id)
+        if not client:
+            return {}
+        return {
+            "bonusBalance": float(client.get("bonusBalance") or 0),
+            "depositBalance": float(client.get("depositBalance") or 0),
+        }
+
+    def prefetch_client(self, type: str, id: str) -> bool:
+        """
+        Начать загрузку информации по клиенту в фоне (например, при сканировании карты)
+
+        Следующий get_client_by_* / build_order с тем же клиентом получит результат
+        предзагрузки (дождется ее, если она еще выполняется) без второго запроса.
+        Если незабранных предзагрузок больше max_prefetches, самая старая отменяется.
+
+        :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+        :param id: значение поля, указанного в type
+
+        :return: True – загрузка начата или уже выполняется, False – неверный идентификатор
+        """
+        id = self._normalize_id(type, id)
+        if id is None:
+            return False
+
+        key = (type, id)
+        with self._lock:
+            if key in self._prefetches:
+                return True
+            future = self.client.executor.submit(self.__load_client, type, id, key, True)
+            self._prefetches[key] = (future, time.monotonic())
+            while len(self._prefetches) > self.max_prefetches:
+                _, (oldest, _) = self._prefetches.popitem(last=False)
+                oldest.cancel()
+                self.metrics.incr("prefetch_dropped")
+        self.metrics.incr("prefetch_started")
+        return True
+
+    def cancel_prefetch(self, type: str, id: str) -> bool:
+        """
+        Отменить предзагрузку (например, если карту отсканировали по ошибке)
+
+        :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+        :param id: значение поля, указанного в type
+
+        :return: True – предзагрузка была, False – предзагрузки нет
+        """
+        id = self._normalize_id(type, id)
+        with self._lock:
+            prefetch = self._prefetches.pop((type, id), None)
+        if prefetch is None:
+            return False
+        # Запрос, который уже отправлен, не прерывается – его результат остается в кэше
+        prefetch[0].cancel()
+        return True
+
+    def _get_client(self, type: str, id: str, use_cache: bool = False) -> dict:
+        """
+        Получить информацию по клиенту и сохранить ее в кэш
+
+        :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+        :param id: значение поля, указанного в type
+        :param use_cache: вернуть информацию из кэша, если она там есть
+                          (кэш stale-while-revalidate настраивается в client.stale_policy["clientInfo"])
+
+        :return: информация по клиенту или {}
+        """
+        id = self._normalize_id(type, id)
+        if id is None:
+            return {}
+
+        key = (type, id)
+        with self._lock:
+            prefetch = self._prefetches.pop(key, None)
+        if prefetch is not None:
+            future, started = prefetch
+            if not future.cancelled() and time.monotonic() - started < self._cache.ttl:
+                try:
+                    return self.__with_balance(future.result())
+                except Exception as error:
+                    print("prefetch", key, error)
+        return self.__with_balance(self.__load_client(type, id, key, use_cache))
+
+    def __with_balance(self, client: dict) -> dict:
+        # Балансы из кэша могут быть старше созданных после этого заказов – берутся из Ledger
+        balance = self._ledger.get(client.get("clientId")) if client else None
+        if balance is None:
+            return client
+        # Формат как в ответе clientInfo: строка с 2 знаками после запятой ("125.00")
+        return dict(client, **{key: "%.2f" % value for key, value in balance.items()})
+
+    def __apply_order(self, type: str, id: str, order: CardLoyaltyOrder.Order):
+        id = CardLoyaltyNormalize.normalize(type, id)
+        client_id = self._ledger.get_client_id(type, id) if id is not None else None
+        if client_id is not None:
+            self._ledger.apply_order(client_id, order.get_to_create_order())
+
+    def __load_client(self, type: str, id: str, key: tuple, use_cache: bool) -> dict:
+        if use_cache:
+            client = self._cache.get(key)
+            if client is not None:
+                return client
+
+        if self._missing.get(key) or self.__filter_rejects(f"{type}:{id}"):
+            self.metrics.incr("client_negative_hits")
+            return {}
+
+        def fetch() -> dict:
+            result = self._client_info(
+                type=type,
+                id=id,
+                errors=True
+            )
+            if result and "error" in result:
+                error = result.get("error")
+                # Кэшируется и не выводится только "клиент не найден": ошибки токена или сервера
+                # выводятся, и следующий запрос снова идет в API
+                if (self.not_found_error_id is not None and isinstance(error, dict)
+                        and str(error.get("errorId")) == str(self.not_found_error_id)):
+                    if self._missing.ttl > 0:
+                        self._missing.set(key, True)
+                else:
+                    self._print_error(params=dict({"type": type, "id": id}, **self.request_data), data=result)
+                return {}
+            if result:
+                self._ledger.set_from_client(result)
+            return result or {}
+
+        client = self._stale_read("clientInfo", key, fetch)
+        if not client:
+            return {}
+
+        self._cache.set(key, client)
+        return client
+
+    def load_clients_filter(self, capacity: int = 1000000, error_rate: float = 0.01, limit: int = 1000,
+                            max_age: float = 300.00) -> int:
+        """
+        Загрузить всех клиентов в фильтр Блума: поиск клиента, которого нет в фильтре,
+        возвращает {} без запроса к API
+
+        Клиенты, созданные после загрузки через add_client / update_client этого объекта,
+        попадают в фильтр сразу. Клиентов, созданных на других кассах или в других процессах,
+        в фильтре нет, поэтому через max_age секунд фильтр перестает использоваться
+        (поиск снова идет в API) – для обновления фильтра load_clients_filter вызывается
+        повторно.
+
+        Фильтр заменяется только после загрузки всех страниц без ошибок: если запрос
+        страницы не удался, остается прежний фильтр (или его отсутствие).
+
+        :param capacity: ожидаемое количество клиентов
+        :param error_rate: допустимая доля лишних запросов к API для отсутствующих клиентов
+        :param limit: по сколько клиентов загружать за один запрос
+        :param max_age: сколько секунд использовать фильтр после загрузки
+
+        :return: количество загруженных клиентов (0 – если загрузка не удалась)
+        """
+        bloom = CardLoyaltyBloom.BloomFilter(capacity=capacity * len(CLIENT_TYPES), error_rate=error_rate)
+        offset = 0
+        while True:
+            page = 0
+            try:
+                for client in self.iter_all_clients(limit=limit, offset=offset):
+                    self._register_client(client, bloom)
+                    page += 1
+            except (ValueError, OSError) as error:
+                # Неполный фильтр считал бы отсутствующими клиентов с непрочитанных страниц
+                print(error)
+                return 0
+            if page < limit:
+                break
+            offset += page
+        self._bloom_expires = time.monotonic() + max_age
+        self._bloom = bloom
+        return offset + page
+
+    def __filter_rejects(self, value: str) -> bool:
+        bloom = self._bloom
+        if bloom is None:
+            return False
+        if time.monotonic() > self._bloom_expires:
+            # Клиентов, созданных на других кассах после загрузки, в фильтре нет
+            self._bloom = None
+            self.metrics.incr("clients_filter_expired")
+            return False
+        return value not in bloom
+
+    def _register_client(self, client: dict, bloom: CardLoyaltyBloom.BloomFilter = None):
+        """
+        Отметить клиента как существующего (фильтр Блума и кэш отсутствующих клиентов)
+
+        :param client: клиент (clientId, phone, cardNumber, cardBarcode)
+        :param bloom: фильтр Блума (None – текущий фильтр)
+        """
+        bloom = bloom if bloom is not None else self._bloom
+        for client_type in CLIENT_TYPES:
+            value = client.get(client_type)
+            if value in (None, ""):
+                continue
+            value = CardLoyaltyNormalize.normalize(client_type, value)
+            if value is None:
+                continue
+            self._missing.delete((client_type, value))
+            if bloom is not None:
+                bloom.add(f"{client_type}:{value}")
+
 
     # WIP
     # def _update_order_by_client_id(self, client_id: int, order: CardLoyaltyOrder.Order) -> dict:
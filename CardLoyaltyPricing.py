@@ -0,0 +1,163 @@
+import re
+
+# Скидочный макет: наименование начинается со слова "Скидка" ("Скидка 5%", "скидка 7,5 %");
+# проценты в других макетах ("Кешбэк 5%", "Бонусы 10%") скидкой на цену не являются
+TEMPLATE_PERCENT = re.compile(r"^\s*скидка\D*?(\d+(?:[.,]\d+)?)\s*%", re.IGNORECASE)
+
+
+class Pricing:
+    def __init__(self):
+        """
+        Инициализация объекта класса Pricing
+
+        Правила не суммируются: для каждой позиции берется минимальная цена
+        среди всех подходящих правил. Цена со скидкой всегда пересчитывается
+        от "price", поэтому повторный вызов apply() дает тот же результат.
+        """
+        self._group_percent = {}
+        self._product_fixed = {}
+        self._product_n_for_m = {}
+        self._percent = 0.00
+
+    def add_percent_discount(self, group_id: str, percent: float) -> bool:
+        """
+        Добавить процентную скидку на группу товаров
+
+        :param group_id: ID группы товара
+        :param percent: процент скидки (от 0 до 100)
+
+        :return: True / False
+        """
+        if 0 <= percent <= 100:
+            self._group_percent[group_id] = percent
+            return True
+        else:
+            return False
+
+    def add_fixed_discount(self, product_id: str, amount: float) -> bool:
+        """
+        Добавить фиксированную скидку на 1 единицу товара
+
+        :param product_id: ID товара
+        :param amount: размер скидки на 1 единицу товара
+
+        :return: True / False
+        """
+        if amount >= 0:
+            self._product_fixed[product_id] = amount
+            return True
+        else:
+            return False
+
+    def add_n_for_m(self, product_id: str, n: int, m: int) -> bool:
+        """
+        Добавить акцию "N по цене M" (например, 3 по цене 2)
+
+        :param product_id: ID товара
+        :param n: сколько единиц товара получает покупатель
+        :param m: за сколько единиц товара платит покупатель
+
+        :return: True / False
+        """
+        if n > 0 and 0 <= m <= n:
+            self._product_n_for_m[product_id] = (n, m)
+            return True
+        else:
+            return False
+
+    def add_template_discount(self, template_id: str, templates: list) -> bool:
+        """
+        Добавить процентную скидку на всю корзину по макету клиента
+
+        Процент берется из наименования скидочного макета – оно начинается со слова
+        "Скидка" (например, "Скидка 5%"). Макеты вида "Кешбэк 5%" или "Бонусы 10%"
+        не дают скидку на цену.
+
+        :param template_id: ID макета клиента
+        :param templates: список макетов (результат getTemplates)
+        Пример templates:
+        [
+            {
+                "id": "4",    # ID Макета
+                "name": "Скидка 5%"    # Наименование макета
+            },
+            {
+                "id": "18",
+                "name": "Кешбэк 5%"
+            }
+        ]
+
+        :return: True (если макет скидочный) / False
+        """
+        for template in templates or []:
+            if str(template.get("id")) != str(template_id):
+                continue
+            match = TEMPLATE_PERCENT.search(template.get("name", ""))
+            if match:
+                percent = float(match.group(1).replace(",", "."))
+                if 0 <= percent <= 100:
+                    self._percent = percent
+                    return True
+        return False
+
+    def clear(self):
+        """
+        Удалить все правила
+        """
+        self._group_percent.clear()
+        self._product_fixed.clear()
+        self._product_n_for_m.clear()
+        self._percent = 0.00
+
+    def get_prices_with_discount(self, lines: list) -> list:
+        """
+        Рассчитать цены со скидкой для всех позиций за один проход
+
+        :param lines: позиции корзины (результат Basket.get_basket_for_order)
+
+        :return: список цен 1 единицы товара со скидкой в порядке lines
+        """
+        nids = [line["nid"] for line in lines]
+        groups = [line["groupId"] for line in lines]
+        amounts = [line["amount"] for line in lines]
+        prices = [line["price"] for line in lines]
+
+        group_percent = self._group_percent
+        product_fixed = self._product_fixed
+        product_n_for_m = self._product_n_for_m
+        basket_factor = 1 - self._percent / 100
+
+        group_factors = [1 - group_percent.get(group, 0) / 100 for group in groups]
+        fixed = [product_fixed.get(nid, 0) for nid in nids]
+        n_for_m_factors = [
+            self._n_for_m_factor(product_n_for_m[nid], amount) if nid in product_n_for_m else 1
+            for nid, amount in zip(nids, amounts)
+        ]
+
+        return [
+            round(max(min(price * basket_factor,
+                          price * group_factor,
+                          price - fixed_off,
+                          price * n_for_m_factor), 0.00), 2)
+            for price, group_factor, fixed_off, n_for_m_factor
+            in zip(prices, group_factors, fixed, n_for_m_factors)
+        ]
+
+    def apply(self, basket) -> float:
+        """
+        Пересчитать "priceWithDiscount" всех позиций корзины
+
+        То же, что basket.apply_pricing(pricing): версия корзины увеличивается,
+        поэтому Order заново формирует данные заказа.
+
+        :param basket: объект класса CardLoyaltyBasket.Basket
+
+        :return: стоимость корзины с учетом скидок
+        """
+        return basket.apply_pricing(self)
+
+    @staticmethod
+    def _n_for_m_factor(rule: tuple, amount: float) -> float:
+        n, m = rule
+        free = (int(amount) // n) * (n - m)
+        return (amount - free) / amount if amount > 0 else 1
@@ -0,0 +1,195 @@
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import CardLoyaltyClient
+import CardLoyaltyRequest
+
+
+class Recorder:
+    def __init__(self, path: str = "traffic.jsonl"):
+        """
+        Инициализация объекта класса Recorder
+
+        Записывает каждый запрос к API в файл JSONL (одна строка – один запрос).
+        Подключение: client.recorder = Recorder("traffic.jsonl"), где client – CardLoyaltyClient.LoyaltyClient
+
+        :param path: путь к файлу записи
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, method: str, endpoint: str, params: dict, body, status: int,
+               latency: float, response, stream: str = None, items: int = None):
+        """
+        Записать запрос
+
+        :param method: HTTP метод
+        :param endpoint: метод API (например, "clientInfo")
+        :param params: параметры запроса (токен не записывается)
+        :param body: тело запроса
+        :param status: HTTP статус ответа
+        :param latency: время запроса в секундах
+        :param response: ответ (раскодированный JSON или текст; None для потокового ответа)
+        :param stream: ключ массива потокового ответа (например, "clients"), None – обычный запрос
+        :param items: сколько элементов массива получено из потокового ответа
+        """
+        record = {
+            "ts": time.time(),
+            "method": method,
+            "endpoint": endpoint,
+            "params": {key: value for key, value in params.items() if key != "token"},
+            "body": body,
+            "status": status,
+            "latency": round(latency, 6),
+            "response": response,
+        }
+        if stream is not None:
+            record.update({"stream": stream, "items": items})
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        """
+        Закрыть файл записи
+        """
+        with self._lock:
+            self._file.close()
+
+
+class Replayer:
+    def __init__(self, path: str, api: str, speed: float = 1.00, threads: int = 16, request=None):
+        """
+        Инициализация объекта класса Replayer
+
+        Повторяет записанные Recorder запросы с сохранением интервалов между ними.
+
+        :param path: путь к файлу записи
+        :param api: адрес API, на который отправлять запросы (например, локальный MockServer)
+        :param speed: ускорение (1 – как в записи, 10 – в 10 раз быстрее, 0 – без пауз)
+        :param threads: количество потоков отправки
+        :param request: объект класса CardLoyaltyRequest.Request, через который отправлять
+                        запросы (по умолчанию – новый Request)
+        """
+        self.path = path
+        self.api = api
+        self.speed = speed
+        self.threads = threads
+        if request is None:
+            request = CardLoyaltyRequest.Request(CardLoyaltyClient.LoyaltyClient(token="", api=api))
+        self.request = request
+
+    def load(self) -> list:
+        """
+        Прочитать записанные запросы
+
+        :return: список записей в порядке времени
+        """
+        with open(self.path, encoding="utf-8") as file:
+            records = [json.loads(line) for line in file if line.strip()]
+        return sorted(records, key=lambda record: record["ts"])
+
+    def replay(self) -> dict:
+        """
+        Повторить записанные запросы
+
+        :return:
+        Пример return:
+        {
+            "requests": 1200,    # Отправлено запросов
+            "errors": 3,    # Запросов без успешного ответа
+            "duration": 61.2,    # Длительность в секундах
+            "p50_ms": 12.1,    # Медиана времени запроса
+            "p99_ms": 80.4,    # 99-й перцентиль времени запроса
+            "recorded_p50_ms": 45.0,    # Медиана времени запроса в записи
+            "recorded_p99_ms": 410.3    # 99-й перцентиль времени запроса в записи
+        }
+        """
+        records = self.load()
+        if not records:
+            return {"requests": 0, "errors": 0, "duration": 0.00}
+
+        first = records[0]["ts"]
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            futures = []
+            for record in records:
+                if self.speed > 0:
+                    delay = (record["ts"] - first) / self.speed - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(executor.submit(self._send, record))
+            results = [future.result() for future in futures]
+        duration = time.monotonic() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        recorded = sorted(record["latency"] for record in records)
+        return {
+            "requests": len(results),
+            "errors": sum(1 for _, ok in results if not ok),
+            "duration": round(duration, 3),
+            "p50_ms": round(statistics.median(latencies) * 1000, 3),
+            "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))] * 1000, 3),
+            "recorded_p50_ms": round(statistics.median(recorded) * 1000, 3),
+            "recorded_p99_ms": round(recorded[int(0.99 * (len(recorded) - 1))] * 1000, 3),
+        }
+
+    def _send(self, record: dict) -> tuple:
+        started = time.perf_counter()
+        try:
+            if record.get("stream"):
+                # Потоковый ответ читается до конца
+                result = sum(1 for _ in self.request._send_request_stream(
+                    method=record["method"],
+                    url=f"{self.api}/{record['endpoint']}",
+                    headers=self.request.headers,
+                    params=dict(record["params"]),
+                    key=record["stream"]
+                ))
+            else:
+                result = self.request._send_request(
+                    method=record["method"],
+                    url=f"{self.api}/{record['endpoint']}",
+                    headers=self.request.headers,
+                    params=dict(record["params"]),
+                    data=record["body"] if record["body"] is not None else dict()
+                )
+        except (requests.RequestException, ValueError):
+            result = None
+        return time.perf_counter() - started, result is not None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Повтор записанных запросов к API CARDLOYALTY")
+    parser.add_argument("path", help="файл записи (JSONL)")
+    parser.add_argument("--api", default=None, help="адрес API (по умолчанию – локальный MockServer)")
+    parser.add_argument("--speed", default="1", help="ускорение: 1, 10, ... или max")
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    mock_server = None
+    api = args.api
+    if api is None:
+        import CardLoyaltyMockServer
+        mock_server = CardLoyaltyMockServer.MockServer(clients=1000)
+        api = mock_server.start()
+
+    replayer = Replayer(
+        path=args.path,
+        api=api,
+        speed=0 if args.speed == "max" else float(args.speed),
+        threads=args.threads
+    )
+    try:
+        print(json.dumps(replayer.replay(), indent=4))
+    finally:
+        if mock_server is not None:
+            mock_server.stop()
@@ -1,18 +1,54 @@
-import requests
+import gzip
+import time
 
-from settings import TOKEN, API
+import CardLoyaltyClient
+import CardLoyaltyNormalize
+
+# Методы API, одинаковые одновременные запросы к которым объединяются (только чтение без
+# побочных эффектов; getNewClients / getNewOrder отдают каждую запись один раз – не объединяются)
+SINGLE_FLIGHT = ("ping", "clientInfo", "getAllClients", "getTags", "getTag", "getTemplates")
+# Методы API, медленные запросы к которым дублируются (client.hedger): только чтение и небольшой ответ
+HEDGE = ("ping", "clientInfo", "getTags", "getTag", "getTemplates")
 
 
 class Request:
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-    api = API
-
-    def __init__(self):
-        self.request_data = {
-            "token": TOKEN
+    def __init__(self, client: CardLoyaltyClient.LoyaltyClient = None):
+        """
+        Инициализация объекта класса Request
+
+        :param client: настройки подключения к API (None – клиент по умолчанию из settings)
+        """
+        self.client = client if client is not None else CardLoyaltyClient.get_default_client()
+
+    @property
+    def api(self) -> str:
+        return self.client.api
+
+    @api.setter
+    def api(self, api: str):
+        # Адрес меняется у client – и у всех объектов, которые используют этот client
+        self.client.api = api
+
+    @property
+    def headers(self) -> dict:
+        return dict(self.client.headers)
+
+    @headers.setter
+    def headers(self, headers: dict):
+        self.client.headers = dict(headers)
+
+    @property
+    def serializer(self):
+        return self.client.serializer
+
+    @property
+    def metrics(self):
+        return self.client.metrics
+
+    @property
+    def request_data(self) -> dict:
+        return {
+            "token": self.client.token
         }
 
     def _ping(self) -> dict:
@@ -37,7 +73,7 @@ class Request:
             data=dict()
         )
 
-    def _client_info(self, type: str, id: str) -> dict:
+    def _client_info(self, type: str, id: str, errors: bool = False) -> dict:
         """
         Получить информацию по клиенту
 
@@ -47,6 +83,7 @@ class Request:
                 cardNumber – Номер карты
                 phone – Телефон
         :param id: значение поля, указанного в type
+        :param errors: вернуть ошибку API (например, клиент не найден) как {"error": {...}}
 
         :return:
         Пример return:
@@ -71,6 +108,9 @@ class Request:
             "sumAllDisсount": "1200.00"    # Сумма всех визитов с учетом скидок
         }
         """
+        id = self._normalize_id(type, id)
+        if id is None:
+            return {}
         params = {
             "type": type,
             "id": id
@@ -80,15 +120,17 @@ class Request:
             url=f"{self.api}/clientInfo",
             headers=self.headers,
             params=params,
-            data=dict()
+            data=dict(),
+            errors=errors
         )
 
-    def _get_clients_all(self, limit: int = 100, offset: int = 0) -> dict:
+    def _get_clients_all(self, limit: int = 100, offset: int = 0, stream: bool = False):
         """
         Получить всех клиентов
 
         :param limit: по сколько клиентов возвращать
         :param offset: смещение
+        :param stream: разбирать ответ по частям и возвращать генератор клиентов
 
         :return:
         Пример return:
@@ -141,6 +183,14 @@ class Request:
             "limit": limit,
             "offset": offset
         }
+        if stream:
+            return self._send_request_stream(
+                method="get",
+                url=f"{self.api}/getAllClients",
+                headers=self.headers,
+                params=params,
+                key="clients"
+            )
         return self._send_request(
             method="get",
             url=f"{self.api}/getAllClients",
@@ -149,11 +199,12 @@ class Request:
             data=dict()
         )
 
-    def _get_clients_new(self, limit: int = 100) -> dict:
+    def _get_clients_new(self, limit: int = 100, stream: bool = False):
         """
         Получить только новых клиентов
 
         :param limit: по сколько клиентов возвращать
+        :param stream: разбирать ответ по частям и возвращать генератор клиентов
 
         :return:
         Пример return:
@@ -205,6 +256,14 @@ class Request:
         params = {
             "limit": limit
         }
+        if stream:
+            return self._send_request_stream(
+                method="get",
+                url=f"{self.api}/getNewClients",
+                headers=self.headers,
+                params=params,
+                key="clients"
+            )
         return self._send_request(
             method="get",
             url=f"{self.api}/getNewClients",
@@ -739,7 +798,7 @@ class Request:
             data=dict()
         )
 
-    def _create_order(self, type: str, id: str, order: dict) -> dict:
+    def _create_order(self, type: str, id: str, order) -> dict:
         """
         Создать заказ (записать транзакцию)
 
@@ -749,7 +808,7 @@ class Request:
                 cardNumber – Номер карты
                 phone – Телефон
         :param id: значение поля, указанного в type
-        :param order: параметры заказа
+        :param order: параметры заказа (dict или закодированный JSON – bytes)
         Пример order:
         {
             "guid": "123",    # ID транзакции
@@ -793,6 +852,9 @@ class Request:
             }
         }
         """
+        id = self._normalize_id(type, id)
+        if id is None:
+            return {}
         params = {
             "type": type,
             "id": id
@@ -857,6 +919,9 @@ class Request:
             }
         }
         """
+        id = self._normalize_id(type, id)
+        if id is None:
+            return {}
         params = {
             "type": type,
             "id": id
@@ -952,6 +1017,9 @@ class Request:
             }
         }
         """
+        id = self._normalize_id(type, id)
+        if id is None:
+            return {}
         params = {
             "type": type,
             "id": id
@@ -1018,6 +1086,9 @@ class Request:
             }
         }
         """
+        id = self._normalize_id(type, id)
+        if id is None:
+            return {}
         params = {
             "type": type,
             "id": id
@@ -1030,26 +1101,187 @@ class Request:
             data=cart
         )
 
+    def _normalize_id(self, type: str, id) -> str:
+        """
+        Проверить идентификатор клиента до запроса к API
+
+        :param type: параметр транзакции (clientId, cardBarcode, cardNumber, phone)
+        :param id: значение поля, указанного в type
+
+        :return: значение в формате API или None, если значение неверное
+        """
+        normalized = CardLoyaltyNormalize.normalize(type, id)
+        if normalized is None:
+            print("invalid", type, id)
+        return normalized
+
     def _send_request(self, method: str, url: str, headers: dict, params: dict,
-                      data: dict):
-        params.update(self.request_data)
-        response = requests.request(
+                      data, errors: bool = False):
+        """
+        Отправить запрос
+
+        Аргументы не изменяются (токен добавляется в копию params), поэтому один объект
+        можно использовать из нескольких потоков одновременно.
+
+        Одинаковые одновременные запросы чтения (SINGLE_FLIGHT, параметры совпадают) выполняются
+        один раз: остальные потоки получают тот же результат (общий объект – не изменяйте его).
+        Медленные запросы чтения (HEDGE) дублируются, если задан client.hedger.
+
+        :param data: тело запроса – dict или уже закодированный JSON (bytes)
+        :param errors: вернуть ответ с ошибкой API ({"error": {...}}) без вывода, а не None
+        """
+        params = dict(params, **self.request_data)
+        endpoint = url.rsplit("/", 1)[-1]
+
+        def send():
+            if self.client.hedger is not None and endpoint in HEDGE:
+                return self.client.hedger.run(
+                    endpoint,
+                    lambda: self.__send(method, url, headers, params, data, errors)
+                )
+            return self.__send(method, url, headers, params, data, errors)
+
+        if self.client.single_flight is not None and endpoint in SINGLE_FLIGHT:
+            key = (url, errors, tuple(sorted((name, str(value)) for name, value in params.items())))
+            result, shared = self.client.single_flight.do(key, send)
+            if shared:
+                self.metrics.incr("single_flight_shared")
+            return result
+        return send()
+
+    def __send(self, method: str, url: str, headers: dict, params: dict, data, errors: bool):
+        if not isinstance(data, bytes):
+            data = self.serializer.dumps(data)
+        body = data
+        data, headers = self.__compress(url=url, headers=headers, data=data)
+        with self.client.slot(url.rsplit("/", 1)[-1]):
+            started = time.perf_counter()
+            response = self.client.request(
+                method=method,
+                url=url,
+                headers=headers,
+                params=params,
+                data=data
+            )
+            size = len(response.content)
+            latency = time.perf_counter() - started
+        self.__count_received(response=response, size=size)
+        if self.client.recorder is not None:
+            self.__record(method, url, params, body, response, latency)
+        return self.__validate(response=response, params=params, errors=errors)
+
+    def _send_request_stream(self, method: str, url: str, headers: dict, params: dict,
+                             key: str, chunk_size: int = 64 * 1024):
+        """
+        Отправить запрос и разбирать массив из ответа по частям
+
+        :param key: ключ массива в ответе (например, "clients")
+        :param chunk_size: размер части ответа в байтах
+
+        :return: генератор элементов массива
+        Ошибка API (статус не 200 или "error" вместо массива) – ValueError, чтобы ее нельзя
+        было спутать с пустым массивом.
+        """
+        params = dict(params, **self.request_data)
+        endpoint = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        items = 0
+        with self.client.slot(endpoint), self.client.request(
             method=method,
             url=url,
             headers=headers,
             params=params,
-            json=data
+            stream=True
+        ) as response:
+            try:
+                if response.status_code == 200:
+                    for item in self.serializer.iter_array(self.__iter_counted(response, chunk_size), key):
+                        items += 1
+                        yield item
+                else:
+                    print(response.status_code, response.text)
+                    raise ValueError(f"{endpoint}: status_code {response.status_code}")
+            finally:
+                # Ответ не сохраняется целиком – записывается количество полученных элементов
+                if self.client.recorder is not None:
+                    self.client.recorder.record(
+                        method=method,
+                        endpoint=endpoint,
+                        params=params,
+                        body=None,
+                        status=response.status_code,
+                        latency=time.perf_counter() - started,
+                        response=None,
+                        stream=key,
+                        items=items
+                    )
+
+    def __record(self, method: str, url: str, params: dict, body: bytes, response, latency: float):
+        try:
+            result = self.serializer.loads(response.content)
+        except ValueError:
+            result = response.text
+        self.client.recorder.record(
+            method=method,
+            endpoint=url.rsplit("/", 1)[-1],
+            params=params,
+            body=self.serializer.loads(body) if body else None,
+            status=response.status_code,
+            latency=latency,
+            response=result
         )
-        return self.__validate(response=response, params=params)
 
-    def __validate(self, response, params):
+    def __iter_counted(self, response, chunk_size: int):
+        size = 0
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.__count_received(response=response, size=size)
+
+    def __compress(self, url: str, headers: dict, data: bytes):
+        self.metrics.incr("bytes_sent_raw", len(data))
+        threshold = self.client.compress_thresholds.get(url.rsplit("/", 1)[-1])
+        if threshold is not None and len(data) >= threshold:
+            compressed = gzip.compress(data)
+            if len(compressed) < len(data):
+                self.metrics.incr("bytes_sent_saved", len(data) - len(compressed))
+                headers = dict(headers)
+                headers["Content-Encoding"] = "gzip"
+                data = compressed
+        self.metrics.incr("bytes_sent", len(data))
+        return data, headers
+
+    def __count_received(self, response, size: int):
+        wire_size = size
+        if response.headers.get("Content-Encoding") and "Content-Length" in response.headers:
+            wire_size = int(response.headers["Content-Length"])
+        self.metrics.incr("bytes_received_raw", size)
+        self.metrics.incr("bytes_received", wire_size)
+        self.metrics.incr("bytes_received_saved", max(size - wire_size, 0))
+
+    def _print_error(self, params: dict, data: dict, status_code: int = 200):
+        """
+        Вывести ошибку API
+
+        :param params: параметры запроса
+        :param data: ответ API с ключом "error"
+        :param status_code: HTTP статус ответа
+        """
+        print("status_code", status_code)
+        print("headers", self.headers)
+        print("params", params)
+        print("response", data)
+
+    def __validate(self, response, params, errors: bool = False):
         if response.status_code == 200:
-            data = response.json()
-            if "error" in data and data.get("error"):
-                print("status_code", response.status_code)
-                print("headers", self.headers)
-                print("params", params)
-                print("response", data)
+            data = self.serializer.loads(response.content)
+            if errors:
+                return data
+            # Список ошибок – частичный результат пакетного метода (createClients, updateClients)
+            if "error" in data and data.get("error") and not isinstance(data.get("error"), list):
+                self._print_error(params=params, data=data, status_code=response.status_code)
             else:
                 return data
         else:
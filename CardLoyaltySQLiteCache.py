@@ -0,0 +1,124 @@
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    def __init__(self, path: str = "cardloyalty_cache.sqlite3", ttl: float = 60.00, max_size: int = 100000,
+                 namespace: str = ""):
+        """
+        Инициализация объекта класса SQLiteCache
+
+        Кэш в файле SQLite (режим WAL), общий для всех процессов на сервере (например,
+        воркеров gunicorn). Интерфейс как у CardLoyaltyCache.Cache, поэтому его можно передать
+        в Organization(cache=...) и в client.stale_cache.
+        Значения хранятся через pickle – файл кэша должен быть доступен только приложению.
+
+        :param path: путь к файлу кэша
+        :param ttl: время жизни записи в секундах
+        :param max_size: максимальное количество записей (при превышении удаляются самые старые)
+        :param namespace: префикс ключей (например, токен организации, если файл общий)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.namespace = namespace
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.__connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, stored REAL NOT NULL)"
+        )
+        self.__connection().execute("CREATE INDEX IF NOT EXISTS cache_stored ON cache (stored)")
+
+    def get(self, key, default=None):
+        """
+        Получить значение из кэша
+
+        :param key: ключ
+        :param default: значение, если записи нет или она устарела
+
+        :return: значение
+        """
+        row = self.__connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires >= ?",
+            (self.__key(key), time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row is not None else default
+
+    def set(self, key, value, ttl: float = None):
+        """
+        Записать значение в кэш
+
+        :param key: ключ
+        :param value: значение
+        :param ttl: время жизни записи в секундах (по умолчанию self.ttl)
+        """
+        now = time.time()
+        self.__connection().execute(
+            "INSERT INTO cache (key, value, expires, stored) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, "
+            "stored = excluded.stored",
+            (self.__key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             now + (self.ttl if ttl is None else ttl), now)
+        )
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % max(self.max_size // 10, 1) == 0
+        if evict:
+            self.evict()
+
+    def delete(self, key) -> bool:
+        """
+        Удалить значение из кэша
+
+        :param key: ключ
+
+        :return: True / False
+        """
+        return self.__connection().execute(
+            "DELETE FROM cache WHERE key = ?",
+            (self.__key(key),)
+        ).rowcount > 0
+
+    def clear(self):
+        """
+        Очистить кэш (только записи своего namespace)
+        """
+        self.__connection().execute(
+            "DELETE FROM cache WHERE substr(key, 1, ?) = ?",
+            (len(self.namespace) + 1, self.namespace + ":")
+        )
+
+    def evict(self):
+        """
+        Удалить устаревшие записи и самые старые записи сверх max_size
+        """
+        connection = self.__connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            connection.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY stored LIMIT max((SELECT count(*) FROM cache) - ?, 0))",
+                (self.max_size,)
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def __key(self, key) -> str:
+        return f"{self.namespace}:{key!r}"
+
+    def __connection(self) -> sqlite3.Connection:
+        # Соединение SQLite нельзя использовать из разных потоков – у каждого потока свое
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.00, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+        return connection
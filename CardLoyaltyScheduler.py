@@ -0,0 +1,130 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import CardLoyaltyMetrics
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Методы API фоновых и массовых задач (выгрузки, загрузки, рассылки)
+BULK_ENDPOINTS = ("getAllClients", "getNewClients", "createClients", "updateClients", "sendCardSMS", "updateVars")
+
+
+class Scheduler:
+    def __init__(self,
+                 capacity: int = 10,
+                 reserved: int = 2,
+                 target_latency: float = 0.50,
+                 bulk_endpoints: tuple = BULK_ENDPOINTS,
+                 ):
+        """
+        Инициализация объекта класса Scheduler
+
+        Очередь запросов с двумя приоритетами: interactive (касса – clientInfo, createOrder, ...)
+        и bulk (массовые задачи, bulk_endpoints). Одновременно выполняется не больше capacity
+        запросов, из них reserved мест только для interactive. Пока есть ожидающие interactive
+        запросы, bulk запросы не начинаются. Если среднее время ответа interactive запросов
+        выше target_latency, лимит bulk запросов уменьшается вдвое, иначе растет на 1.
+        Подключение: client.scheduler = Scheduler(capacity=client.pool_size)
+
+        :param capacity: максимальное количество одновременных запросов (обычно размер пула соединений)
+        :param reserved: количество мест только для interactive запросов
+        :param target_latency: целевое время ответа interactive запросов в секундах
+        :param bulk_endpoints: методы API с приоритетом bulk
+        """
+        self.capacity = capacity
+        self.reserved = min(reserved, capacity - 1)
+        self.target_latency = target_latency
+        self.bulk_endpoints = bulk_endpoints
+        self.metrics = CardLoyaltyMetrics.Metrics()
+        self.bulk_limit = self.capacity - self.reserved
+        self._running = {INTERACTIVE: 0, BULK: 0}
+        self._waiting = 0
+        self._latency = 0.00
+        self._adjusted = 0.00
+        self._condition = threading.Condition()
+
+    def lane(self, endpoint: str) -> str:
+        """
+        Приоритет метода API
+
+        :param endpoint: метод API (например, "createClients")
+
+        :return: "interactive" или "bulk"
+        """
+        return BULK if endpoint in self.bulk_endpoints else INTERACTIVE
+
+    @contextmanager
+    def slot(self, endpoint: str):
+        """
+        Занять место для запроса на время блока with
+
+        :param endpoint: метод API
+        """
+        lane = self.lane(endpoint)
+        with self._condition:
+            if lane == INTERACTIVE:
+                self._waiting += 1
+                while self._running[INTERACTIVE] + self._running[BULK] >= self.capacity:
+                    self._condition.wait()
+                self._waiting -= 1
+            else:
+                if not self.__bulk_allowed():
+                    self.metrics.incr("bulk_throttled")
+                while not self.__bulk_allowed():
+                    self._condition.wait()
+            self._running[lane] += 1
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            latency = time.perf_counter() - started
+            with self._condition:
+                self._running[lane] -= 1
+                if lane == INTERACTIVE:
+                    self.__observe(latency)
+                self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """
+        Текущее состояние очереди
+
+        :return:
+        Пример return:
+        {
+            "interactive": 3,    # выполняется interactive запросов
+            "bulk": 4,    # выполняется bulk запросов
+            "waiting": 0,    # ожидает interactive запросов
+            "bulk_limit": 8,    # текущий лимит bulk запросов
+            "latency": 0.12    # среднее время ответа interactive запросов
+        }
+        """
+        with self._condition:
+            return {
+                INTERACTIVE: self._running[INTERACTIVE],
+                BULK: self._running[BULK],
+                "waiting": self._waiting,
+                "bulk_limit": self.bulk_limit,
+                "latency": round(self._latency, 6),
+            }
+
+    def __bulk_allowed(self) -> bool:
+        running = self._running[INTERACTIVE] + self._running[BULK]
+        return (not self._waiting and running < self.capacity - self.reserved
+                and self._running[BULK] < self.bulk_limit)
+
+    def __observe(self, latency: float):
+        # Экспоненциальное среднее; лимит bulk меняется не чаще раза в 100 мс
+        self._latency = latency if not self._latency else self._latency * 0.9 + latency * 0.1
+        now = time.monotonic()
+        if now - self._adjusted < 0.10:
+            return
+        self._adjusted = now
+        if self._latency > self.target_latency:
+            if self.bulk_limit > 1:
+                self.bulk_limit = max(self.bulk_limit // 2, 1)
+                self.metrics.incr("bulk_limit_decreased")
+        elif self.bulk_limit < self.capacity - self.reserved:
+            self.bulk_limit += 1
@@ -0,0 +1,113 @@
+import codecs
+import json
+import re
+
+orjson = None
+_default = None
+
+
+class Serializer:
+    name = "json"
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+
+    def dumps(self, value) -> bytes:
+        """
+        Закодировать значение в JSON
+
+        :param value: значение
+
+        :return: bytes (UTF-8)
+        """
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes):
+        """
+        Раскодировать JSON
+
+        :param data: JSON (bytes или str)
+
+        :return: значение
+        """
+        return json.loads(data)
+
+    def iter_array(self, chunks, key: str):
+        """
+        Раскодировать массив по ключу верхнего уровня по частям
+
+        В памяти хранится только текущий элемент массива, а не весь ответ.
+
+        :param chunks: итератор частей JSON (bytes), например response.iter_content()
+        :param key: ключ массива (например, "clients")
+
+        :return: генератор элементов массива
+        Если ключа нет (например, ответ {"error": ...}) или JSON обрезан – ValueError.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        raw_decode = self._decoder.raw_decode
+        pattern = re.compile(r'"%s"\s*:\s*(\[|null)' % re.escape(key))
+        chunks = iter(chunks)
+        buffer = ""
+
+        match = pattern.search(buffer)
+        while not match:
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError(f"В JSON нет массива \"{key}\": {buffer[:1000]}")
+            buffer += decoder.decode(chunk)
+            match = pattern.search(buffer)
+        if match.group(1) == "null":
+            return
+
+        pos = match.end()
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                if buffer[pos] == "]":
+                    return
+                try:
+                    item, end = raw_decode(buffer, pos)
+                except ValueError:
+                    pass
+                else:
+                    # Число может быть обрезано ("1." + "5", "1e" + "3") – оно готово,
+                    # только когда за ним идет разделитель, иначе ждем следующую часть
+                    if (not isinstance(item, (int, float))
+                            or (end < len(buffer) and buffer[end] in " \t\r\n,]")):
+                        yield item
+                        pos = end
+                        continue
+
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError(f"Неожиданный конец JSON в массиве \"{key}\"")
+            buffer = buffer[pos:] + decoder.decode(chunk)
+            pos = 0
+
+
+class OrjsonSerializer(Serializer):
+    name = "orjson"
+
+    def dumps(self, value) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes):
+        return orjson.loads(data)
+
+
+def get_serializer() -> Serializer:
+    """
+    Получить самый быстрый из доступных сериализаторов
+
+    :return: OrjsonSerializer, если установлен orjson, иначе Serializer (стандартный json)
+    """
+    global orjson, _default
+    if _default is None:
+        try:
+            import orjson
+            _default = OrjsonSerializer()
+        except ImportError:
+            _default = Serializer()
+    return _default
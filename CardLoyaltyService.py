@@ -1,9 +1,17 @@
 import CardLoyaltyBasic
+import CardLoyaltyClient
 
 
 class Service(CardLoyaltyBasic.Basic):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, client: CardLoyaltyClient.LoyaltyClient = None):
+        """
+        Инициализация объекта класса Service
+
+        :param client: настройки подключения к API (None – клиент по умолчанию из settings)
+
+        Теги и макеты можно отдавать из кэша с обновлением в фоне – см. client.stale_policy.
+        """
+        super().__init__(client)
 
     def add_tag(self, tag_name: str) -> dict:
         """
@@ -40,7 +48,7 @@ class Service(CardLoyaltyBasic.Basic):
             }
         ]
         """
-        tags = self._get_tags()
+        tags = self._stale_read("getTags", (), self._get_tags) or {}
         if "tags" in tags:
             return tags.get("tags")
         else:
@@ -65,7 +73,7 @@ class Service(CardLoyaltyBasic.Basic):
             "name": "Бонусный макет"
         }
         """
-        return self._get_templates()
+        return self._stale_read("getTemplates", (), self._get_templates)
 
     def get_tag_name(self, tag_id: int) -> str:
         """
@@ -76,7 +84,7 @@ class Service(CardLoyaltyBasic.Basic):
         :return:
         Пример return: "Москва -10%"
         """
-        tag = self._get_tag(tag_id)
+        tag = self._stale_read("getTag", tag_id, lambda: self._get_tag(tag_id)) or {}
         if "tagName" in tag:
             return tag.get("tagName")
         else:
@@ -0,0 +1,66 @@
+import threading
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Инициализация объекта класса SingleFlight
+
+        Объединение одинаковых одновременных запросов: пока запрос с ключом выполняется,
+        остальные потоки с тем же ключом ждут его результат, а не отправляют свой.
+        """
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function) -> tuple:
+        """
+        Выполнить функцию один раз для всех одновременных вызовов с одним ключом
+
+        :param key: ключ запроса (hashable)
+        :param function: функция без аргументов
+
+        :return: (результат функции, True – результат получен от другого потока)
+        Исключение функции передается всем ожидающим потокам.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """
+        Количество выполняющихся запросов
+
+        :return: int
+        """
+        with self._lock:
+            return len(self._calls)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import CardLoyaltyClient
+from CardLoyaltyBasket import Basket
+from CardLoyaltyOrder import Order
+from CardLoyaltyOrganization import Organization
+from CardLoyaltyPricing import Pricing
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def make_basket(lines: int) -> Basket:
+    basket = Basket()
+    for i in range(lines):
+        basket.add_item(
+            product_id=str(i),
+            name=f"Товар {i}",
+            amount=1 + i % 5,
+            price=100.00 + i % 50,
+            discount_price=100.00 + i % 50,
+            group_id=str(i % 20),
+            group_name=f"Группа {i % 20}"
+        )
+    return basket
+
+
+def make_pricing() -> Pricing:
+    pricing = Pricing()
+    for group in range(0, 20, 2):
+        pricing.add_percent_discount(str(group), 5 + group)
+    for product in range(0, 1000, 7):
+        pricing.add_fixed_discount(str(product), 3.00)
+    for product in range(0, 1000, 11):
+        pricing.add_n_for_m(str(product), 3, 2)
+    pricing.add_template_discount("4", [{"id": "4", "name": "Скидка 5%"}])
+    return pricing
+
+
+def percentile(values: list, percent: float) -> float:
+    values = sorted(values)
+    index = min(int(round(percent / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def measure(name: str, operation, iterations: int, threads: int = 1) -> dict:
+    """
+    Замерить операцию
+
+    :param name: название замера
+    :param operation: функция без аргументов (одна операция)
+    :param iterations: количество операций
+    :param threads: количество потоков
+
+    :return:
+    Пример return:
+    {
+        "name": "basket_build",
+        "ops": 1520.3,    # операций в секунду
+        "p50_ms": 0.61,    # медиана времени операции
+        "p99_ms": 0.93,    # 99-й перцентиль времени операции
+        "memory_kb": 412.5    # пик выделенной памяти за одну операцию
+    }
+    """
+    def timed(_=None):
+        started = time.perf_counter()
+        operation()
+        return time.perf_counter() - started
+
+    operation()
+    tracemalloc.start()
+    operation()
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            latencies = list(executor.map(timed, range(iterations)))
+    else:
+        latencies = [timed() for _ in range(iterations)]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "name": name,
+        "ops": round(iterations / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "memory_kb": round(memory / 1024, 1),
+    }
+
+
+def measure_import(module: str, runs: int) -> dict:
+    """
+    Замерить время импорта модуля в новом процессе интерпретатора
+
+    :param module: название модуля
+    :param runs: количество запусков
+
+    :return: результат в формате measure() (ops – импортов в секунду)
+    """
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    latencies = [
+        float(subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True,
+                             check=True).stdout)
+        for _ in range(runs)
+    ]
+    return {
+        "name": f"import_{module}",
+        "ops": round(1 / statistics.median(latencies), 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "memory_kb": 0.0,
+    }
+
+
+def start_server(clients: int) -> tuple:
+    """
+    Запустить CardLoyaltyMockServer в отдельном процессе
+
+    tracemalloc учитывает память всех потоков процесса, поэтому сервер в том же процессе
+    попал бы в замеры памяти вместе с библиотекой.
+
+    :param clients: сколько клиентов создать на сервере
+
+    :return: (процесс сервера, адрес API)
+    """
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen(
+        [sys.executable, "CardLoyaltyMockServer.py", "--port", "0", "--clients", str(clients)],
+        cwd=cwd, stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline().strip()
+    if not line.startswith("API="):
+        process.kill()
+        raise RuntimeError(f"CardLoyaltyMockServer не запустился: {line}")
+    return process, line[len("API="):]
+
+
+def run(quick: bool = False) -> list:
+    """
+    Запустить все замеры на локальном сервере CardLoyaltyMockServer
+
+    :param quick: уменьшить количество итераций
+
+    :return: список результатов measure()
+    """
+    scale = 0.1 if quick else 1
+    server, api = start_server(clients=5000)
+    client = CardLoyaltyClient.LoyaltyClient(token="bench", api=api, pool_size=16)
+    organization = Organization(client)
+    results = [
+        measure_import("CardLoyaltyBasket", max(int(20 * scale), 3)),
+        measure_import("CardLoyaltyOrganization", max(int(20 * scale), 3)),
+    ]
+    try:
+        basket = make_basket(1000)
+        pricing = make_pricing()
+        counter = iter(range(10 ** 9))
+
+        results.append(measure("basket_build_1000", lambda: make_basket(1000), int(200 * scale)))
+        results.append(measure("basket_pricing_1000", lambda: basket.apply_pricing(pricing), int(500 * scale)))
+        results.append(measure(
+            "order_build_1000",
+            lambda: Order(str(next(counter)), "1", datetime.now(), basket).get_to_create_order_json(),
+            int(500 * scale)
+        ))
+        results.append(measure(
+            "client_lookup",
+            lambda: organization.get_client_by_phone(str(79000000000 + next(counter) % 5000)),
+            int(1000 * scale)
+        ))
+
+        small_basket = make_basket(5)
+
+        def create_order():
+            order = Order(f"bench-{next(counter)}", "1", datetime.now(), small_basket)
+            organization.create_order_by_card(str(100000 + next(counter) % 5000), order)
+
+        results.append(measure("order_create_sequential", create_order, int(500 * scale)))
+
+        def checkout():
+            organization.checkout("cardNumber", str(100000 + next(counter) % 5000), f"bench-{next(counter)}", "1",
+                                  datetime.now(), make_basket(50), pricing=pricing)
+
+        results.append(measure("checkout_pipeline_50", checkout, int(300 * scale)))
+        results.append(measure("order_create_parallel_8", create_order, int(2000 * scale), threads=8))
+
+        def paginate():
+            offset = 0
+            while True:
+                page = sum(1 for _ in organization.iter_all_clients(limit=1000, offset=offset))
+                if page < 1000:
+                    break
+                offset += page
+
+        results.append(measure("client_pagination_5000", paginate, max(int(20 * scale), 2)))
+    finally:
+        client.close()
+        server.terminate()
+        server.wait()
+    return results
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """
+    Сравнить результаты с базовыми
+
+    :param results: список результатов measure()
+    :param baseline: базовые результаты {название замера: результат}
+    :param threshold: допустимое падение ops (например, 0.2 – на 20%)
+
+    :return: список названий замеров с регрессией
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if base and result["ops"] < base["ops"] * (1 - threshold):
+            regressions.append(result["name"])
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры производительности CardLoyalty")
+    parser.add_argument("--quick", action="store_true", help="уменьшить количество итераций")
+    parser.add_argument("--save", action="store_true", help="сохранить результаты как базовые")
+    parser.add_argument("--baseline", default=BASELINE, help="файл базовых результатов")
+    parser.add_argument("--threshold", type=float, default=0.20, help="допустимое падение ops")
+    args = parser.parse_args()
+
+    bench_results = run(quick=args.quick)
+    bench_baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            bench_baseline = json.load(file)
+
+    print(f"{'name':<28}{'ops/sec':>12}{'p50 ms':>10}{'p99 ms':>10}{'mem KB':>10}{'base ops':>12}")
+    for bench_result in bench_results:
+        base_ops = bench_baseline.get(bench_result["name"], {}).get("ops", "")
+        print(f"{bench_result['name']:<28}{bench_result['ops']:>12}{bench_result['p50_ms']:>10}"
+              f"{bench_result['p99_ms']:>10}{bench_result['memory_kb']:>10}{base_ops:>12}")
+
+    bench_regressions = compare(bench_results, bench_baseline, args.threshold)
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({result["name"]: result for result in bench_results}, file, indent=4)
+        print(f"\nБазовые результаты сохранены в {args.baseline}")
+    if bench_regressions:
+        print("\nРегрессия:", ", ".join(bench_regressions))
+        raise SystemExit(1)
@@ -1,5 +1,30 @@
 import json
+from datetime import date, datetime
+
+BIRTHDAY_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y")
 
 
 def dump(value):
     print((json.dumps(value, indent=4, sort_keys=True, ensure_ascii=False)))
+
+
+def format_birthday(birthday) -> str:
+    """
+    Привести дату рождения к формату API (ГГГГ-ММ-ДД)
+
+    :param birthday: datetime, date или строка (ГГГГ-ММ-ДД, ДД.ММ.ГГГГ, ДД/ММ/ГГГГ), "" – не указана
+
+    :return: дата рождения в формате ГГГГ-ММ-ДД или ""
+    Пример return: "1990-01-31"
+    """
+    if isinstance(birthday, (datetime, date)):
+        return birthday.strftime("%Y-%m-%d")
+    birthday = (birthday or "").strip()
+    if not birthday:
+        return ""
+    for birthday_format in BIRTHDAY_FORMATS:
+        try:
+            return datetime.strptime(birthday, birthday_format).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    raise ValueError(f"Неверная дата рождения: {birthday}")
@@ -1,8 +1,21 @@
 import os
 
-from dotenv import load_dotenv
+_loaded = False
 
-load_dotenv()
 
-TOKEN = os.environ.get("TOKEN")
-API = os.environ.get("API")
+def load():
+    """
+    Загрузить переменные окружения из .env (один раз, при первом обращении к настройкам)
+    """
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
+
+
+def __getattr__(name: str):
+    if name in ("TOKEN", "API"):
+        load()
+        return os.environ.get(name)
+    raise AttributeError(f"module 'settings' has no attribute '{name}'")
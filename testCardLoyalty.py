@@ -1,13 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import sys
 import time
 
 from CardLoyaltyBasket import Basket
+from CardLoyaltyClient import LoyaltyClient
+from CardLoyaltyMockServer import MockServer
 from CardLoyaltyOrder import Order
 from CardLoyaltyService import Service
 from CardLoyaltyOrganization import Organization
+from CardLoyaltyPricing import Pricing
 from functions import dump
 
-test = "Organization"
+# Раздел можно выбрать аргументом: python testCardLoyalty.py Threads
+test = sys.argv[1] if len(sys.argv) > 1 else "Organization"
 
 if test == "Basket":
     new_basket = Basket()
@@ -75,6 +81,37 @@ if test == "Basket":
     print("\nСтоимость корзины после обновления цены товара")
     print(new_basket.get_basket_price())                                    # 310.0
     print(new_basket.get_basket_price_with_discount())                      # 260.0
+elif test == "Pricing":
+    new_basket = Basket()
+    new_basket.add_item(
+        product_id="84",
+        name="Картошка",
+        amount=5,
+        price=30.00,
+        discount_price=30.00,
+        group_id="7",
+        group_name="Овощи"
+    )
+    new_basket.add_item(
+        product_id="97",
+        name="Морковка",
+        amount=3,
+        price=50.00,
+        discount_price=50.00,
+        group_id="7",
+        group_name="Овощи"
+    )
+
+    # Правила скидок
+    pricing = Pricing()
+    pricing.add_percent_discount("7", 10)               # -10% на овощи
+    pricing.add_n_for_m("97", 3, 2)                     # морковка 3 по цене 2
+    pricing.add_template_discount("4", [{"id": "4", "name": "Скидка 5%"}])
+
+    # Пересчет цен со скидкой
+    print("\nСтоимость корзины со скидками")
+    print(new_basket.apply_pricing(pricing))            # 234.99
+    dump(new_basket.get_basket_for_order())
 elif test == "Order":
     # Создание корзины заказа
     new_basket = Basket()
@@ -163,6 +200,39 @@ elif test == "Service":
     )
     print("\nСМС")
     dump(res)
+elif test == "Threads":
+    # Один объект Organization на все потоки (локальный сервер CardLoyaltyMockServer)
+    server = MockServer(token="test", clients=1000)
+    organizat = Organization(LoyaltyClient(token="test", api=server.start(), pool_size=32))
+
+    order_basket = Basket()
+    order_basket.add_item(
+        product_id="84",
+        name="Картошка",
+        amount=5,
+        price=30.00,
+        discount_price=25.00,
+        group_id="7",
+        group_name="Овощи"
+    )
+
+    def check(i: int) -> bool:
+        # Ответ должен относиться к запросу своего потока
+        phone = str(79000000000 + i % 1000)
+        if organizat.get_client_by_phone(phone).get("phone") != phone:
+            return False
+        new_order = Order(f"thread_{i}", str(i), datetime.now(), order_basket)
+        return organizat.create_order_by_card(str(100000 + i % 1000), new_order).get("guid") == f"thread_{i}"
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        results = list(executor.map(check, range(5000)))
+    server.stop()
+
+    print("\nЗапросов из 32 потоков", len(results))
+    print("Ошибок", results.count(False))                   # 0
+    dump(organizat.metrics.snapshot())
+    if results.count(False):
+        sys.exit(1)
 elif test == "Organization":
     organizat = Organization()
 